@@ -1,6 +1,6 @@
 import pygame
 import socket
-import json
+import orjson
 import threading
 import sys
 import os
@@ -10,7 +10,12 @@ pygame.init()
 
 # Screen dimensions
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+FPS = 60
+try:
+    # Sync presents to the display refresh where the driver allows it
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE, vsync=1)
+except (pygame.error, TypeError):
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
 pygame.display.set_caption("Multiplayer Game Client")
 
 # Colors
@@ -35,11 +40,28 @@ small_font = pygame.font.SysFont("Arial", 24)
 tiny_font = pygame.font.SysFont("Arial", 18)
 question_font = pygame.font.SysFont("Arial", 20)
 
+def grid_positions(count, x, y, col_step, row_step, columns=1):
+    """Top-left corner of each cell in a row-major button grid"""
+    return [(x + (i % columns) * col_step, y + (i // columns) * row_step) for i in range(count)]
+
+def apply_room_patches(room, patches):
+    """Apply room_patch operations in order; a path walks dict keys and list indexes"""
+    for patch in patches:
+        *parents, key = patch['path']
+        target = room
+        for part in parents:
+            target = target[part]
+        if patch['op'] == 'set':
+            target[key] = patch['val']
+        else:
+            target.pop(key, None)
+
 class GameClient:
     def __init__(self, server_host='localhost', server_port=5555):
         self.server_host = server_host
         self.server_port = server_port
         self.socket = None
+        self.server_stream = None
         self.connected = False
         self.current_user = None
         self.current_room = None
@@ -214,6 +236,7 @@ class GameClient:
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.connect((self.server_host, self.server_port))
+            self.server_stream = self.socket.makefile('rb')
             self.connected = True
             
             # Start listening for server messages
@@ -233,22 +256,16 @@ class GameClient:
         """Listen for messages from the server"""
         while self.connected:
             try:
-                data = self.socket.recv(4096).decode('utf-8')
-                if not data:
+                # Each message is one line of JSON
+                data = self.server_stream.readline()
+                if not data.endswith(b'\n'):
                     break
                     
-                messages = data.split('}{')
-                for i, msg in enumerate(messages):
-                    if i > 0:
-                        msg = '{' + msg
-                    if i < len(messages) - 1:
-                        msg = msg + '}'
-                        
-                    try:
-                        message = json.loads(msg)
-                        self.handle_server_message(message)
-                    except json.JSONDecodeError:
-                        print(f"❌ Invalid JSON received: {msg}")
+                try:
+                    message = orjson.loads(data)
+                    self.handle_server_message(message)
+                except orjson.JSONDecodeError:
+                    print(f"❌ Invalid JSON received: {data}")
                         
             except Exception as e:
                 print(f"❌ Error receiving from server: {e}")
@@ -326,6 +343,15 @@ class GameClient:
         elif action == 'room_updated':
             self.current_room = data['room_data']
             
+        elif action == 'room_patch':
+            # Patches only apply to the same room at the version they were made from; otherwise resync
+            if (self.current_room and self.current_room.get('room_id') == data['room_id']
+                    and self.current_room.get('version') == data['base_version']):
+                apply_room_patches(self.current_room, data['patches'])
+                self.current_room['version'] = data['version']
+            else:
+                self.handle_get_room_status()
+            
         elif action == 'rooms_updated':
             self.available_rooms = data['rooms']
             self.create_room_buttons()
@@ -342,7 +368,7 @@ class GameClient:
         }
         
         try:
-            self.socket.send(json.dumps(message).encode('utf-8'))
+            self.socket.sendall(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE))
         except Exception as e:
             print(f"❌ Error sending to server: {e}")
             self.show_message("Failed to send message to server", ERROR_COLOR)
@@ -358,10 +384,10 @@ class GameClient:
         """Create buttons for available rooms"""
         self.room_buttons = []
         
-        for i, room in enumerate(self.available_rooms):
-            y_pos = 150 + (i * 80)
+        positions = grid_positions(len(self.available_rooms), WIDTH//2 - 200, 150, 0, 80)
+        for room, (x_pos, y_pos) in zip(self.available_rooms, positions):
             if y_pos < HEIGHT - 200:
-                self.room_buttons.append(RoomButton(WIDTH//2 - 200, y_pos, 400, 70, room))
+                self.room_buttons.append(RoomButton(x_pos, y_pos, 400, 70, room))
 
     def create_option_buttons(self):
         """Create buttons for quiz options"""
@@ -370,11 +396,12 @@ class GameClient:
         if self.current_question < len(self.QUESTIONS):
             question_data = self.QUESTIONS[self.current_question]
             
-            for i, option in enumerate(question_data["options"]):
-                y_pos = 200 + (i * 70)
+            options = question_data["options"]
+            positions = grid_positions(len(options), WIDTH//2 - 300, 200, 0, 70)
+            for option, (x_pos, y_pos) in zip(options, positions):
                 if y_pos < HEIGHT - 150:
                     option_key = option[0]  # Get A, B, C, etc.
-                    self.option_buttons.append(OptionButton(WIDTH//2 - 300, y_pos, 600, 60, option, option_key))
+                    self.option_buttons.append(OptionButton(x_pos, y_pos, 600, 60, option, option_key))
 
     def create_character_buttons(self):
         """Create buttons for character selection"""
@@ -383,12 +410,8 @@ class GameClient:
         if self.user_role in self.CHARACTER_IMAGES:
             character_list = self.CHARACTER_IMAGES[self.user_role]
             
-            for i, char_data in enumerate(character_list):
-                row = i // 2
-                col = i % 2
-                x_pos = WIDTH//2 - 200 + (col * 220)
-                y_pos = 200 + (row * 180)
-                
+            positions = grid_positions(len(character_list), WIDTH//2 - 200, 200, 220, 180, columns=2)
+            for char_data, (x_pos, y_pos) in zip(character_list, positions):
                 self.character_buttons.append(CharacterButton(x_pos, y_pos, 180, 160, char_data))
 
     def initialize_quiz(self):
@@ -491,7 +514,7 @@ class GameClient:
             self.draw_ui(current_width, current_height)
             
             pygame.display.flip()
-            clock.tick(60)
+            clock.tick(FPS)
 
     def handle_events(self, event, mouse_pos):
         """Handle pygame events"""
@@ -938,6 +961,8 @@ class InputBox:
         surface.blit(text_surf, text_rect)
 
 class Button:
+    __slots__ = ('rect', 'text', 'is_hovered')
+
     def __init__(self, x, y, width, height, text):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
@@ -961,6 +986,8 @@ class Button:
         return False
 
 class OptionButton:
+    __slots__ = ('rect', 'text', 'option_key', 'is_hovered', 'is_selected')
+
     def __init__(self, x, y, width, height, text, option_key):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
@@ -1010,6 +1037,8 @@ class OptionButton:
         return False
 
 class CharacterButton:
+    __slots__ = ('rect', 'character_data', 'is_hovered', 'is_selected', 'image')
+
     def __init__(self, x, y, width, height, character_data):
         self.rect = pygame.Rect(x, y, width, height)
         self.character_data = character_data
@@ -1018,11 +1047,12 @@ class CharacterButton:
         
         # Load image or create placeholder
         try:
-            self.image = pygame.image.load(character_data['path'])
+            # Convert once to the display format so per-frame blits skip pixel conversion
+            self.image = pygame.image.load(character_data['path']).convert_alpha()
             self.image = pygame.transform.scale(self.image, (width - 20, height - 60))
         except:
             # Create placeholder if image not found
-            self.image = pygame.Surface((width - 20, height - 60))
+            self.image = pygame.Surface((width - 20, height - 60)).convert()
             self.image.fill((100, 100, 100))
             text = tiny_font.render(character_data['name'], True, TEXT_COLOR)
             text_rect = text.get_rect(center=(self.image.get_width()//2, self.image.get_height()//2))
@@ -1056,6 +1086,8 @@ class CharacterButton:
         return False
 
 class RoomButton:
+    __slots__ = ('rect', 'room_data', 'is_hovered')
+
     def __init__(self, x, y, width, height, room_data):
         self.rect = pygame.Rect(x, y, width, height)
         self.room_data = room_data
@@ -0,0 +1,46 @@
+"""Outbound message encoders for the game server.
+
+Every message is one line of JSON. This module holds no server state and is
+fully annotated so it can be compiled ahead of time with mypyc
+(`mypyc encoders.py`); server.py then imports the compiled extension in place
+of this file without any other change.
+"""
+import functools
+from typing import Any
+
+import orjson
+
+# Fixed part of every error response; encode_error adds the message
+ERROR_RESPONSE: dict[str, str] = {'action': 'error', 'status': 'error'}
+
+# room_patch has a fixed shape; only the values are serialized per broadcast
+ROOM_PATCH_TEMPLATE: bytes = b'{"action":"room_patch","data":{"room_id":%b,"base_version":%d,"version":%d,"patches":%b}}\n'
+
+# Both room list messages share the same encoded list of rooms
+GET_ROOMS_TEMPLATE: bytes = b'{"action":"get_rooms_response","status":"success","data":{"rooms":%b}}\n'
+ROOMS_UPDATED_TEMPLATE: bytes = b'{"action":"rooms_updated","data":{"rooms":%b}}\n'
+
+def encode_body(value: Any) -> bytes:
+    """Serialize a value to embed in a message template.
+    
+    Room timestamps are naive UTC and go out with an explicit +00:00;
+    ObjectIds fall back to str().
+    """
+    return orjson.dumps(value, default=str, option=orjson.OPT_NAIVE_UTC)
+
+def encode_message(message: dict[str, Any]) -> bytes:
+    """Serialize a message as one newline-terminated line, ready to send"""
+    return orjson.dumps(message, default=str, option=orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE)
+
+@functools.lru_cache(maxsize=256)
+def encode_error(error_message: str) -> bytes:
+    """Encoded error response; handlers send the same few error strings over and over"""
+    return encode_message({**ERROR_RESPONSE, 'message': error_message})
+
+def encode_room_patch(room_id: str, base_version: int, version: int, patches: list[dict[str, Any]]) -> bytes:
+    """Encoded room_patch message, filled into ROOM_PATCH_TEMPLATE"""
+    return ROOM_PATCH_TEMPLATE % (encode_body(room_id), base_version, version, encode_body(patches))
+
+def encode_room_list(template: bytes, rooms: list[dict[str, Any]]) -> bytes:
+    """Encoded room list message, filled into GET_ROOMS_TEMPLATE or ROOMS_UPDATED_TEMPLATE"""
+    return template % encode_body(rooms)
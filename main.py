@@ -1,12 +1,15 @@
 import pygame
 import sys
+import functools
+import io
 import os
 import re
 import random
 import string
+import threading
 from datetime import datetime
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, DuplicateKeyError
+from pymongo import MongoClient, monitoring
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, PyMongoError
 import bcrypt
 from dotenv import load_dotenv
 
@@ -19,7 +22,12 @@ pygame.mixer.init()
 
 # Screen dimensions
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+FPS = 60
+try:
+    # Sync presents to the display refresh where the driver allows it
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE, vsync=1)
+except (pygame.error, TypeError):
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
 pygame.display.set_caption("Game Lobby System")
 
 # Colors
@@ -39,10 +47,39 @@ OPTION_HOVER = (80, 80, 100)
 OPTION_SELECTED = (100, 150, 200)
 
 # Font
-font = pygame.font.SysFont("Arial", 32)
-small_font = pygame.font.SysFont("Arial", 24)
-tiny_font = pygame.font.SysFont("Arial", 18)
-question_font = pygame.font.SysFont("Arial", 20)
+# Look up Arial once and read the file once; each size is parsed from memory
+FONT_PATH = pygame.font.match_font("Arial")
+font_bytes = None
+if FONT_PATH:
+    with open(FONT_PATH, 'rb') as font_file:
+        font_bytes = font_file.read()
+
+@functools.lru_cache(maxsize=None)
+def load_font(size):
+    if font_bytes is None:
+        return pygame.font.Font(None, size)
+    return pygame.font.Font(io.BytesIO(font_bytes), size)
+
+font = load_font(32)
+small_font = load_font(24)
+tiny_font = load_font(18)
+question_font = load_font(20)
+
+# Text surfaces are reused across frames; the fonts above live for the whole session
+@functools.lru_cache(maxsize=256)
+def render_text(text_font, text, color):
+    return text_font.render(text, True, color)
+
+@functools.lru_cache(maxsize=256)
+def render_centered_text(text_font, text, color):
+    """Rendered text plus its half width, for blitting centered on a column"""
+    surf = render_text(text_font, text, color)
+    return surf, surf.get_width() // 2
+
+@functools.lru_cache(maxsize=64)
+def render_player_row(player, character):
+    """Game screen's "<player>: <character>" line, keyed by the pair rather than the formatted text"""
+    return render_centered_text(small_font, f"{player}: {character}", TEXT_COLOR)
 
 # Get configuration from environment variables
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
@@ -63,6 +100,20 @@ def safe_print(message):
         safe_message = message.encode('ascii', 'replace').decode('ascii')
         print(safe_message)
 
+# Tracks server health from the driver's background heartbeats
+class HeartbeatListener(monitoring.ServerHeartbeatListener):
+    def __init__(self):
+        self.healthy_servers = set()
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        self.healthy_servers.add(event.connection_id)
+    
+    def failed(self, event):
+        self.healthy_servers.discard(event.connection_id)
+
 # MongoDB Configuration
 class MongoDB:
     def __init__(self, connection_string=MONGODB_URI, db_name=DATABASE_NAME):
@@ -70,6 +121,7 @@ class MongoDB:
         self.db = None
         self.users_collection = None
         self.rooms_collection = None
+        self.heartbeat_listener = HeartbeatListener()
         self.connection_string = connection_string
         self.db_name = db_name
         self.connect()
@@ -77,9 +129,18 @@ class MongoDB:
     def connect(self):
         try:
             safe_print("Attempting to connect to MongoDB...")
-            self.client = MongoClient(self.connection_string, serverSelectionTimeoutMS=10000)
+            # Keep a small pool of warm connections for the UI and the room watcher
+            self.client = MongoClient(
+                self.connection_string,
+                maxPoolSize=10,
+                minPoolSize=2,
+                maxIdleTimeMS=60000,
+                waitQueueTimeoutMS=2000,
+                serverSelectionTimeoutMS=2000,
+                event_listeners=[self.heartbeat_listener]
+            )
             
-            # Test connection with longer timeout
+            # Test connection
             self.client.server_info()
             self.db = self.client[self.db_name]
             self.users_collection = self.db.users
@@ -101,13 +162,8 @@ class MongoDB:
             self.client = None
     
     def is_connected(self):
-        try:
-            if self.client:
-                self.client.server_info()
-                return True
-        except:
-            return False
-        return False
+        """Report connection health from the latest heartbeats, without a round-trip"""
+        return self.client is not None and bool(self.heartbeat_listener.healthy_servers)
     
     def insert_user(self, user_data):
         if not self.is_connected():
@@ -223,6 +279,64 @@ class MongoDB:
             safe_print(f"Room character update error: {e}")
             return False
 
+# Background room watcher
+class RoomWatcher:
+    """Keep a local copy of one room document up to date from a background thread.
+    
+    Follows a change stream on the room when the deployment supports one
+    (replica sets / Atlas) and otherwise polls get_room() every poll_interval
+    seconds, so the render loop never waits on MongoDB for room updates.
+    """
+    def __init__(self, db, room_id, poll_interval=1.0):
+        self.db = db
+        self.room_id = room_id
+        self.poll_interval = poll_interval
+        self._room = None
+        self._changed = False
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def take_update(self):
+        """Return the latest room document if it changed since the last call, else None"""
+        with self._lock:
+            if not self._changed:
+                return None
+            self._changed = False
+            return self._room
+    
+    def stop(self):
+        self._stopped.set()
+    
+    def _publish(self, room):
+        if room is None:
+            return
+        with self._lock:
+            if room != self._room:
+                self._room = room
+                self._changed = True
+    
+    def _run(self):
+        room = self.db.get_room(self.room_id)
+        self._publish(room)
+        if room is not None:
+            try:
+                self._follow_change_stream(room['_id'])
+            except PyMongoError:
+                pass  # Change streams unavailable (e.g. standalone server), poll instead
+        
+        while not self._stopped.wait(self.poll_interval):
+            self._publish(self.db.get_room(self.room_id))
+    
+    def _follow_change_stream(self, document_id):
+        pipeline = [{"$match": {"documentKey._id": document_id}}]
+        with self.db.rooms_collection.watch(pipeline, full_document='updateLookup', max_await_time_ms=1000) as stream:
+            while not self._stopped.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    self._publish(change.get('fullDocument'))
+
 # Initialize MongoDB
 mongo_db = MongoDB()
 
@@ -378,12 +492,14 @@ class InputBox:
         elif not self.text and not self.active:
             display_text = self.placeholder
             
-        text_surf = small_font.render(display_text, True, TEXT_COLOR)
+        text_surf = render_text(small_font, display_text, TEXT_COLOR)
         text_rect = text_surf.get_rect(midleft=(self.rect.x + 10, self.rect.centery))
         surface.blit(text_surf, text_rect)
 
 # Button class
 class Button:
+    __slots__ = ('rect', 'text', 'is_hovered')
+
     def __init__(self, x, y, width, height, text):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
@@ -394,7 +510,7 @@ class Button:
         pygame.draw.rect(surface, color, self.rect, border_radius=12)
         pygame.draw.rect(surface, (255, 255, 255), self.rect, 2, border_radius=12)
         
-        text_surf = small_font.render(self.text, True, BUTTON_TEXT)
+        text_surf = render_text(small_font, self.text, BUTTON_TEXT)
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
         
@@ -408,6 +524,8 @@ class Button:
 
 # Option Button class for quiz
 class OptionButton:
+    __slots__ = ('rect', 'text', 'option_key', 'is_hovered', 'is_selected')
+
     def __init__(self, x, y, width, height, text, option_key):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
@@ -442,7 +560,7 @@ class OptionButton:
         
         # Draw text lines
         for i, line in enumerate(lines):
-            text_surf = question_font.render(line, True, TEXT_COLOR)
+            text_surf = render_text(question_font, line, TEXT_COLOR)
             text_rect = text_surf.get_rect(midleft=(self.rect.x + 10, self.rect.y + 15 + i * 25))
             surface.blit(text_surf, text_rect)
         
@@ -458,6 +576,8 @@ class OptionButton:
 
 # Character Selection Button
 class CharacterButton:
+    __slots__ = ('rect', 'character_data', 'is_hovered', 'is_selected', 'image')
+
     def __init__(self, x, y, width, height, character_data):
         self.rect = pygame.Rect(x, y, width, height)
         self.character_data = character_data
@@ -466,11 +586,12 @@ class CharacterButton:
         
         # Load image or create placeholder
         try:
-            self.image = pygame.image.load(character_data['path'])
+            # Convert once to the display format so per-frame blits skip pixel conversion
+            self.image = pygame.image.load(character_data['path']).convert_alpha()
             self.image = pygame.transform.scale(self.image, (width - 20, height - 60))
         except:
             # Create placeholder if image not found
-            self.image = pygame.Surface((width - 20, height - 60))
+            self.image = pygame.Surface((width - 20, height - 60)).convert()
             self.image.fill((100, 100, 100))
             text = tiny_font.render(character_data['name'], True, TEXT_COLOR)
             text_rect = text.get_rect(center=(self.image.get_width()//2, self.image.get_height()//2))
@@ -489,7 +610,7 @@ class CharacterButton:
         surface.blit(self.image, (self.rect.x + 10, self.rect.y + 10))
         
         # Draw character name
-        name_text = tiny_font.render(self.character_data['name'], True, TEXT_COLOR)
+        name_text = render_text(tiny_font, self.character_data['name'], TEXT_COLOR)
         name_rect = name_text.get_rect(center=(self.rect.centerx, self.rect.y + self.rect.height - 25))
         surface.blit(name_text, name_rect)
         
@@ -505,6 +626,8 @@ class CharacterButton:
 
 # Room Button class
 class RoomButton:
+    __slots__ = ('rect', 'room_data', 'is_hovered')
+
     def __init__(self, x, y, width, height, room_data):
         self.rect = pygame.Rect(x, y, width, height)
         self.room_data = room_data
@@ -516,15 +639,15 @@ class RoomButton:
         pygame.draw.rect(surface, (255, 255, 255), self.rect, 2, border_radius=8)
         
         # Room ID
-        room_id_text = small_font.render(f"Room: {self.room_data['room_id']}", True, BUTTON_TEXT)
+        room_id_text = render_text(small_font, f"Room: {self.room_data['room_id']}", BUTTON_TEXT)
         surface.blit(room_id_text, (self.rect.x + 10, self.rect.y + 10))
         
         # Creator
-        creator_text = tiny_font.render(f"Creator: {self.room_data['creator']}", True, BUTTON_TEXT)
+        creator_text = render_text(tiny_font, f"Creator: {self.room_data['creator']}", BUTTON_TEXT)
         surface.blit(creator_text, (self.rect.x + 10, self.rect.y + 40))
         
         # Players count
-        players_text = tiny_font.render(f"Players: {len(self.room_data.get('players', []))}/4", True, BUTTON_TEXT)
+        players_text = render_text(tiny_font, f"Players: {len(self.room_data.get('players', []))}/4", BUTTON_TEXT)
         surface.blit(players_text, (self.rect.x + self.rect.width - 100, self.rect.y + 40))
         
     def check_hover(self, pos):
@@ -695,17 +818,42 @@ def play_video(video_path):
 # Load background image
 def load_background_image(width, height):
     try:
-        background_image = pygame.image.load("Data\\Images\\Front.jpg")
+        background_image = pygame.image.load("Data\\Images\\Front.jpg").convert()
         background_image = pygame.transform.scale(background_image, (width, height))
         return background_image, True
     except:
-        background_image = pygame.Surface((width, height))
+        background_image = pygame.Surface((width, height)).convert()
         background_image.fill((40, 44, 52))
         return background_image, False
 
+# Scaled character portraits, keyed by image path
+character_image_cache = {}
+
+# Blank gray portrait, copied and labelled for characters whose image is missing
+placeholder_portrait = pygame.Surface((200, 200)).convert()
+placeholder_portrait.fill((100, 100, 100))
+
+def load_character_image(path, name):
+    """Load a 200x200 character portrait, decoding the file only on first use.
+    
+    If the image cannot be loaded, a gray placeholder labelled with the
+    character's name is built once and cached under the same path.
+    """
+    image = character_image_cache.get(path)
+    if image is None:
+        try:
+            image = pygame.image.load(path).convert_alpha()
+            image = pygame.transform.smoothscale(image, (200, 200))
+        except (FileNotFoundError, pygame.error):
+            image = placeholder_portrait.copy()
+            name_text = render_text(small_font, name, TEXT_COLOR)
+            image.blit(name_text, name_text.get_rect(center=(100, 100)))
+        character_image_cache[path] = image
+    return image
+
 # Create overlay
 def create_overlay(width, height):
-    overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+    overlay = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
     overlay.fill((0, 0, 0, 180))
     return overlay
 
@@ -755,6 +903,13 @@ video_duration = 5000  # 5 seconds for demo
 # My Room variables
 my_room_available = False
 
+# Watches current_room in the background while the room or game screen is shown
+room_watcher = None
+
+# Lobby state is loaded from the database on entry, not every frame
+lobby_dirty = False
+lobby_user_data = None
+
 # Input boxes for sign up
 signup_username = InputBox(WIDTH//2 - 150, 200, 300, 40, 'Username')
 signup_email = InputBox(WIDTH//2 - 150, 260, 300, 40, 'Email')
@@ -780,6 +935,7 @@ join_room_btn = Button(WIDTH//2 + 10, HEIGHT - 200, 140, 50, "Join Room")
 my_room_btn = Button(WIDTH//2 - 75, HEIGHT - 130, 150, 50, "My Room")
 continue_game_btn = Button(WIDTH//2 - 75, HEIGHT - 70, 150, 40, "Continue Game")
 logout_btn = Button(WIDTH//2 - 75, HEIGHT - 20, 150, 40, "Logout")
+refresh_lobby_btn = Button(WIDTH - 160, 20, 140, 40, "Refresh")
 
 # Room buttons
 join_with_id_btn = Button(WIDTH//2 - 150, HEIGHT - 150, 140, 50, "Join with ID")
@@ -800,6 +956,34 @@ confirm_character_btn = Button(WIDTH//2 - 75, HEIGHT - 80, 150, 40, "Confirm Cha
 # Video buttons
 skip_video_btn = Button(WIDTH//2 - 75, HEIGHT - 80, 150, 40, "Skip Video")
 
+# Positioned game-screen player rows, rebuilt when the room snapshot changes
+player_list_cache = {"key": None, "blits": []}
+
+# Database status for the footer, refreshed at most once per DB_STATUS_INTERVAL ms
+DB_STATUS_INTERVAL = 1000
+db_status_cache = {"checked_at": None, "connected": False, "user_count": 0, "footer": None}
+
+def render_footer(connected, user_count):
+    """Compose both database status lines into one surface so the footer is a single blit"""
+    if connected:
+        status_text = render_text(tiny_font, "MongoDB: Connected", SUCCESS_COLOR)
+        detail_text = render_text(tiny_font, f"Total Users: {user_count}", (150, 150, 150))
+    else:
+        status_text = render_text(tiny_font, "MongoDB: Disconnected", ERROR_COLOR)
+        # Show connection help message
+        detail_text = render_text(tiny_font, "Check .env file and MongoDB connection", WARNING_COLOR)
+    
+    footer = pygame.Surface((max(status_text.get_width(), detail_text.get_width()), 50), pygame.SRCALPHA).convert_alpha()
+    footer.blit(status_text, (0, 0))
+    footer.blit(detail_text, (0, 20))
+    return footer
+
+# Redraw only after an event or state change; the first frame always draws.
+# When only small regions changed they are listed in dirty_rects and just
+# those parts of the window are presented.
+screen_dirty = True
+dirty_rects = []
+
 # Message variables
 message_text = ""
 message_color = TEXT_COLOR
@@ -811,15 +995,19 @@ def show_message(text, color=TEXT_COLOR, duration=300):
     message_color = color
     message_timer = duration
 
+def grid_positions(count, x, y, col_step, row_step, columns=1):
+    """Top-left corner of each cell in a row-major button grid"""
+    return [(x + (i % columns) * col_step, y + (i // columns) * row_step) for i in range(count)]
+
 def refresh_rooms():
     global available_rooms, room_buttons
     available_rooms = mongo_db.get_all_rooms()
     room_buttons = []
     
-    for i, room in enumerate(available_rooms):
-        y_pos = 150 + (i * 80)
+    positions = grid_positions(len(available_rooms), WIDTH//2 - 200, 150, 0, 80)
+    for room, (x_pos, y_pos) in zip(available_rooms, positions):
         if y_pos < HEIGHT - 200:  # Don't go beyond screen
-            room_buttons.append(RoomButton(WIDTH//2 - 200, y_pos, 400, 70, room))
+            room_buttons.append(RoomButton(x_pos, y_pos, 400, 70, room))
 
 def initialize_quiz():
     global current_question, user_answers, option_buttons, quiz_completed, current_video, video_playing, video_start_time
@@ -851,11 +1039,12 @@ def create_option_buttons():
     if current_question < len(QUESTIONS):
         question_data = QUESTIONS[current_question]
         
-        for i, option in enumerate(question_data["options"]):
-            y_pos = 200 + (i * 70)
+        options = question_data["options"]
+        positions = grid_positions(len(options), WIDTH//2 - 300, 200, 0, 70)
+        for option, (x_pos, y_pos) in zip(options, positions):
             if y_pos < HEIGHT - 150:
                 option_key = option[0]  # Get A, B, C, etc.
-                option_buttons.append(OptionButton(WIDTH//2 - 300, y_pos, 600, 60, option, option_key))
+                option_buttons.append(OptionButton(x_pos, y_pos, 600, 60, option, option_key))
 
 def create_character_buttons(role):
     global character_buttons
@@ -863,12 +1052,8 @@ def create_character_buttons(role):
     
     character_list = CHARACTER_IMAGES.get(role, [])
     
-    for i, char_data in enumerate(character_list):
-        row = i // 2
-        col = i % 2
-        x_pos = WIDTH//2 - 200 + (col * 220)
-        y_pos = 200 + (row * 180)
-        
+    positions = grid_positions(len(character_list), WIDTH//2 - 200, 200, 220, 180, columns=2)
+    for char_data, (x_pos, y_pos) in zip(character_list, positions):
         character_buttons.append(CharacterButton(x_pos, y_pos, 180, 160, char_data))
 
 def check_my_room_availability():
@@ -881,6 +1066,328 @@ def check_my_room_availability():
     my_room_available = False
     return False
 
+def refresh_lobby():
+    """Reload the lobby's My Room / Continue Game state from the database"""
+    global lobby_dirty, lobby_user_data
+    check_my_room_availability()
+    lobby_user_data = mongo_db.find_user({"username": current_user['username']}) if current_user else None
+    lobby_dirty = False
+
+def draw_screen(current_width, current_height, current_time):
+    """Compose the current state's UI onto the screen surface.
+    
+    Text and images reach the screen in batched screen.blits() calls rather
+    than one blit() per surface.
+    """
+    blits = screen.blits
+    center_x = current_width // 2
+    
+    blits(((background_image, (0, 0)), (overlay, (0, 0))), doreturn=False)
+    
+    # Text and images are queued and drawn with one blits() call per run;
+    # the queue is flushed before anything else touches the screen, so the
+    # draw order stays as laid out below (labels under the widgets after them)
+    blit_list = []
+    queue = blit_list.append
+    
+    def flush_text():
+        blits(blit_list, doreturn=False)
+        blit_list.clear()
+    
+    if current_state == STATE_MAIN:
+        # Draw main menu
+        title, title_half = render_centered_text(font, "Welcome to Game Lobby", TEXT_COLOR)
+        queue((title, (center_x - title_half, 100)))
+        
+        flush_text()
+        sign_in_btn.draw(screen)
+        sign_up_btn.draw(screen)
+        
+    elif current_state == STATE_SIGN_UP:
+        # Draw sign up form
+        title, title_half = render_centered_text(font, "Create Account", TEXT_COLOR)
+        queue((title, (center_x - title_half, 100)))
+        
+        flush_text()
+        signup_username.draw(screen)
+        signup_email.draw(screen)
+        signup_password.draw(screen)
+        signup_confirm.draw(screen)
+        
+        submit_btn.draw(screen)
+        back_btn.draw(screen)
+        
+    elif current_state == STATE_SIGN_IN:
+        # Draw sign in form
+        title, title_half = render_centered_text(font, "Sign In", TEXT_COLOR)
+        queue((title, (center_x - title_half, 100)))
+        
+        flush_text()
+        signin_username.draw(screen)
+        signin_password.draw(screen)
+        
+        submit_btn.draw(screen)
+        back_btn.draw(screen)
+    
+    elif current_state == STATE_LOBBY:
+        # Draw lobby
+        welcome_text, welcome_text_half = render_centered_text(font, f"Welcome, {username}!", TEXT_COLOR)
+        queue((welcome_text, (center_x - welcome_text_half, 100)))
+        
+        instruction, instruction_half = render_centered_text(small_font, "Choose an option below:", TEXT_COLOR)
+        queue((instruction, (center_x - instruction_half, 160)))
+        
+        flush_text()
+        create_room_btn.draw(screen)
+        join_room_btn.draw(screen)
+        
+        # Show My Room button if available
+        if my_room_available:
+            flush_text()
+            my_room_btn.draw(screen)
+            room_info, room_info_half = render_centered_text(tiny_font, f"Your room: {current_user.get('last_room', 'Unknown')}", SUCCESS_COLOR)
+            queue((room_info, (center_x - room_info_half, HEIGHT - 180)))
+        else:
+            no_room_text, no_room_text_half = render_centered_text(tiny_font, "No active room to rejoin", WARNING_COLOR)
+            queue((no_room_text, (center_x - no_room_text_half, HEIGHT - 180)))
+        
+        # Show Continue Game button if user has a character
+        if lobby_user_data and lobby_user_data.get('character'):
+            flush_text()
+            continue_game_btn.draw(screen)
+            continue_info, continue_info_half = render_centered_text(tiny_font, f"Continue as {lobby_user_data.get('character')}", SUCCESS_COLOR)
+            queue((continue_info, (center_x - continue_info_half, HEIGHT - 130)))
+        
+        flush_text()
+        refresh_lobby_btn.draw(screen)
+        logout_btn.draw(screen)
+    
+    elif current_state == STATE_JOIN_ROOM:
+        # Draw join room interface
+        title, title_half = render_centered_text(font, "Join a Room", TEXT_COLOR)
+        queue((title, (center_x - title_half, 80)))
+        
+        # Room ID input
+        room_id_label = render_text(small_font, "Enter Room ID:", TEXT_COLOR)
+        queue((room_id_label, (center_x - 150, 220)))
+        flush_text()
+        room_id_input.draw(screen)
+        join_with_id_btn.draw(screen)
+        
+        # Available rooms
+        rooms_label, rooms_label_half = render_centered_text(small_font, "Available Rooms:", TEXT_COLOR)
+        queue((rooms_label, (center_x - rooms_label_half, 320)))
+        
+        flush_text()
+        for room_btn in room_buttons:
+            room_btn.draw(screen)
+        
+        refresh_rooms_btn.draw(screen)
+        back_btn.draw(screen)
+    
+    elif current_state == STATE_ROOM:
+        # Draw room interface
+        title, title_half = render_centered_text(font, f"Room: {current_room['room_id']}", TEXT_COLOR)
+        queue((title, (center_x - title_half, 80)))
+        
+        # Room creator
+        creator_text, creator_text_half = render_centered_text(small_font, f"Created by: {current_room['creator']}", TEXT_COLOR)
+        queue((creator_text, (center_x - creator_text_half, 130)))
+        
+        # Players list
+        players_label = render_text(small_font, "Players:", TEXT_COLOR)
+        queue((players_label, (center_x - 200, 180)))
+        
+        player_characters = current_room.get('player_characters', {})
+        
+        for i, player in enumerate(current_room.get('players', [])):
+            character = player_characters.get(player, "Not selected")
+            player_text = render_text(small_font, f"{i+1}. {player} - {character}", TEXT_COLOR)
+            queue((player_text, (center_x - 180, 220 + i * 40)))
+        
+        # Show start button only for room creator
+        if current_room['creator'] == username and not current_room.get('game_started', False):
+            flush_text()
+            start_game_btn.draw(screen)
+        
+        flush_text()
+        leave_room_btn.draw(screen)
+        
+        # Show game status
+        if current_room.get('game_started', False):
+            status_text, status_text_half = render_centered_text(small_font, "Game in progress...", SUCCESS_COLOR)
+            queue((status_text, (center_x - status_text_half, HEIGHT - 200)))
+    
+    elif current_state == STATE_VIDEO:
+        # Draw video playback interface
+        title, title_half = render_centered_text(font, f"Question {current_question + 1} of {len(QUESTIONS)}", TEXT_COLOR)
+        queue((title, (center_x - title_half, 80)))
+        
+        # Video placeholder
+        video_rect = pygame.Rect(center_x - 200, 150, 400, 300)
+        flush_text()
+        pygame.draw.rect(screen, (30, 30, 30), video_rect)
+        pygame.draw.rect(screen, (100, 100, 100), video_rect, 2)
+        
+        video_text, video_text_half = render_centered_text(small_font, "Video Playing...", TEXT_COLOR)
+        queue((video_text, (center_x - video_text_half, 160)))
+        
+        # Show video progress
+        if video_playing:
+            progress = min(1.0, (current_time - video_start_time) / video_duration)
+            progress_width = int(360 * progress)
+            progress_rect = pygame.Rect(center_x - 180, 470, progress_width, 20)
+            flush_text()
+            pygame.draw.rect(screen, SUCCESS_COLOR, progress_rect)
+            pygame.draw.rect(screen, (200, 200, 200), (center_x - 180, 470, 360, 20), 2)
+        
+        flush_text()
+        skip_video_btn.draw(screen)
+        
+        # Auto-advance notification
+        auto_text, auto_text_half = render_centered_text(tiny_font, "Video will auto-advance to question when finished", (150, 150, 150))
+        queue((auto_text, (center_x - auto_text_half, HEIGHT - 120)))
+    
+    elif current_state == STATE_QUIZ:
+        # Draw quiz interface
+        if current_question < len(QUESTIONS):
+            question_data = QUESTIONS[current_question]
+            
+            # Question number
+            q_num_text, q_num_text_half = render_centered_text(font, f"Question {current_question + 1} of {len(QUESTIONS)}", TEXT_COLOR)
+            queue((q_num_text, (center_x - q_num_text_half, 80)))
+            
+            # Question text (wrapped)
+            question_lines = []
+            words = question_data["question"].split(' ')
+            current_line = []
+            
+            for word in words:
+                test_line = ' '.join(current_line + [word])
+                test_width = question_font.size(test_line)[0]
+                if test_width < current_width - 100:
+                    current_line.append(word)
+                else:
+                    question_lines.append(' '.join(current_line))
+                    current_line = [word]
+            if current_line:
+                question_lines.append(' '.join(current_line))
+            
+            for i, line in enumerate(question_lines):
+                q_text, q_text_half = render_centered_text(question_font, line, TEXT_COLOR)
+                queue((q_text, (center_x - q_text_half, 130 + i * 30)))
+            
+            # Draw option buttons
+            flush_text()
+            for option_btn in option_buttons:
+                option_btn.draw(screen)
+            
+            # Auto-advance notification
+            auto_text, auto_text_half = render_centered_text(tiny_font, "Select an option to automatically continue", (150, 150, 150))
+            queue((auto_text, (center_x - auto_text_half, HEIGHT - 120)))
+            
+            flush_text()
+            back_btn.draw(screen)
+    
+    elif current_state == STATE_ROLE_SELECTION:
+        # Draw role selection interface
+        title, title_half = render_centered_text(font, "Choose Your Character", TEXT_COLOR)
+        queue((title, (center_x - title_half, 80)))
+        
+        role_text, role_text_half = render_centered_text(small_font, f"Your Role: {user_role}", SUCCESS_COLOR)
+        queue((role_text, (center_x - role_text_half, 130)))
+        
+        instruction, instruction_half = render_centered_text(small_font, "Select your character from the options below:", TEXT_COLOR)
+        queue((instruction, (center_x - instruction_half, 160)))
+        
+        # Draw character buttons
+        flush_text()
+        for char_btn in character_buttons:
+            char_btn.draw(screen)
+        
+        select_character_btn.draw(screen)
+        
+        if selected_character:
+            selected_text, selected_text_half = render_centered_text(small_font, f"Selected: {selected_character}", SUCCESS_COLOR)
+            queue((selected_text, (center_x - selected_text_half, current_height - 120)))
+        
+        flush_text()
+        back_btn.draw(screen)
+    
+    elif current_state == STATE_CHARACTER_CONFIRM:
+        # Draw character confirmation interface
+        title, title_half = render_centered_text(font, "Confirm Your Character", TEXT_COLOR)
+        queue((title, (center_x - title_half, 80)))
+        
+        # Show selected character image and name
+        if selected_character_data:
+            char_img = load_character_image(selected_character_data['path'], selected_character_data['name'])
+            queue((char_img, (center_x - 100, 150)))
+        
+        confirm_text, confirm_text_half = render_centered_text(font, f"Your Role: {selected_character}", SUCCESS_COLOR)
+        queue((confirm_text, (center_x - confirm_text_half, 370)))
+        
+        instruction, instruction_half = render_centered_text(small_font, "This will be your character for the game. Confirm your choice?", TEXT_COLOR)
+        queue((instruction, (center_x - instruction_half, 420)))
+        
+        flush_text()
+        confirm_character_btn.draw(screen)
+        back_btn.draw(screen)
+    
+    elif current_state == STATE_GAME:
+        # Draw game interface
+        title, title_half = render_centered_text(font, "Game Started!", TEXT_COLOR)
+        queue((title, (center_x - title_half, 80)))
+        
+        # Show character image and role
+        if selected_character_data:
+            char_img = load_character_image(selected_character_data['path'], selected_character_data['name'])
+            queue((char_img, (center_x - 100, 150)))
+        
+        role_text, role_text_half = render_centered_text(font, f"Your Role: {selected_character}", SUCCESS_COLOR)
+        queue((role_text, (center_x - role_text_half, 370)))
+        
+        # Show other players in the room
+        if current_room:
+            players = current_room.get('players') or []
+            player_characters = current_room.get('player_characters') or {}
+                
+            players_label, players_label_half = render_centered_text(small_font, "Players in your room:", TEXT_COLOR)
+            queue((players_label, (center_x - players_label_half, 420)))
+            
+            # Rebuild the positioned rows only when the room snapshot changes
+            key = (tuple(players), tuple(sorted(player_characters.items())), username, center_x)
+            if player_list_cache["key"] != key:
+                player_blits = []
+                y_offset = 460
+                
+                for player in players:
+                    if player != username:
+                        character = player_characters.get(player, "Choosing character...")
+                        player_text, player_text_half = render_player_row(player, character)
+                        player_blits.append((player_text, (center_x - player_text_half, y_offset)))
+                        y_offset += 40
+                
+                # Show waiting message if not all players have characters
+                if len(player_characters) < len(players):
+                    wait_text, wait_text_half = render_centered_text(small_font, "Waiting for other players to choose characters...", WARNING_COLOR)
+                    player_blits.append((wait_text, (center_x - wait_text_half, y_offset + 20)))
+                
+                player_list_cache["key"] = key
+                player_list_cache["blits"] = player_blits
+            
+            blit_list.extend(player_list_cache["blits"])
+    
+    # Draw message if any
+    if message_text and message_timer > 0:
+        msg_surf, msg_surf_half = render_centered_text(small_font, message_text, message_color)
+        queue((msg_surf, (center_x - msg_surf_half, current_height - 200)))
+    
+    # Draw database status and user count
+    queue((db_status_cache["footer"], (10, current_height - 50)))
+    
+    blits(blit_list, doreturn=False)
+
 # Main game loop
 clock = pygame.time.Clock()
 running = True
@@ -889,8 +1396,11 @@ while running:
     current_width, current_height = screen.get_size()
     mouse_pos = pygame.mouse.get_pos()
     current_time = pygame.time.get_ticks()
+    username = current_user['username'] if current_user else None
     
     for event in pygame.event.get():
+        # Any input, resize or expose event can change what is on screen
+        screen_dirty = True
         if event.type == pygame.QUIT:
             running = False
         
@@ -924,9 +1434,10 @@ while running:
                 success, result = sign_in(signin_username.text, signin_password.text)
                 if success:
                     current_user = result
-                    check_my_room_availability()
+                    username = current_user['username']
+                    lobby_dirty = True
                     current_state = STATE_LOBBY
-                    show_message(f"Welcome, {current_user['username']}!", SUCCESS_COLOR)
+                    show_message(f"Welcome, {username}!", SUCCESS_COLOR)
                     # Clear inputs
                     signin_username.text = signin_password.text = ""
                 else:
@@ -935,7 +1446,7 @@ while running:
         elif current_state == STATE_JOIN_ROOM:
             if room_id_input.handle_event(event):
                 # Join room on Enter key
-                success, message = join_room(room_id_input.text, current_user['username'])
+                success, message = join_room(room_id_input.text, username)
                 show_message(message, SUCCESS_COLOR if success else ERROR_COLOR)
                 if success:
                     current_room = mongo_db.get_room(room_id_input.text)
@@ -945,7 +1456,7 @@ while running:
             # Check room button clicks
             for room_btn in room_buttons:
                 if room_btn.is_clicked(mouse_pos, event):
-                    success, message = join_room(room_btn.room_data['room_id'], current_user['username'])
+                    success, message = join_room(room_btn.room_data['room_id'], username)
                     show_message(message, SUCCESS_COLOR if success else ERROR_COLOR)
                     if success:
                         current_room = room_btn.room_data
@@ -1023,9 +1534,10 @@ while running:
                 success, result = sign_in(signin_username.text, signin_password.text)
                 if success:
                     current_user = result
-                    check_my_room_availability()
+                    username = current_user['username']
+                    lobby_dirty = True
                     current_state = STATE_LOBBY
-                    show_message(f"Welcome, {current_user['username']}!", SUCCESS_COLOR)
+                    show_message(f"Welcome, {username}!", SUCCESS_COLOR)
                     signin_username.text = signin_password.text = ""
                 else:
                     show_message(result, ERROR_COLOR)
@@ -1034,6 +1546,7 @@ while running:
             if current_state in [STATE_SIGN_IN, STATE_SIGN_UP]:
                 current_state = STATE_MAIN
             elif current_state in [STATE_CREATE_ROOM, STATE_JOIN_ROOM]:
+                lobby_dirty = True
                 current_state = STATE_LOBBY
             elif current_state == STATE_QUIZ:
                 # Go back to previous question
@@ -1060,7 +1573,7 @@ while running:
             show_message("")  # Clear any previous messages
         
         if create_room_btn.is_clicked(mouse_pos, event):
-            success, room_id, message = create_room(current_user['username'])
+            success, room_id, message = create_room(username)
             show_message(message, SUCCESS_COLOR if success else ERROR_COLOR)
             if success:
                 current_room = mongo_db.get_room(room_id)
@@ -1076,13 +1589,13 @@ while running:
                 room = mongo_db.get_room(current_user['last_room'])
                 if room and room.get('is_active', True):
                     # Check if user is still in the room
-                    if current_user['username'] in room.get('players', []):
+                    if username in room.get('players', []):
                         current_room = room
                         current_state = STATE_ROOM
                         show_message(f"Rejoined your room: {room['room_id']}")
                     else:
                         # Try to rejoin the room
-                        success, message = join_room(current_user['last_room'], current_user['username'])
+                        success, message = join_room(current_user['last_room'], username)
                         if success:
                             current_room = mongo_db.get_room(current_user['last_room'])
                             current_state = STATE_ROOM
@@ -1097,7 +1610,7 @@ while running:
                 room = mongo_db.get_room(current_user['last_room'])
                 if room and room.get('is_active', True) and room.get('game_started', False):
                     # Check if user has already completed character selection
-                    user_data = mongo_db.find_user({"username": current_user['username']})
+                    user_data = mongo_db.find_user({"username": username})
                     if user_data and user_data.get('character'):
                         # User has a character, continue to game
                         current_room = room
@@ -1123,11 +1636,15 @@ while running:
         if logout_btn.is_clicked(mouse_pos, event):
             current_state = STATE_MAIN
             current_user = None
+            username = None
             show_message("Logged out successfully")
         
+        if current_state == STATE_LOBBY and refresh_lobby_btn.is_clicked(mouse_pos, event):
+            lobby_dirty = True
+        
         if join_with_id_btn.is_clicked(mouse_pos, event):
             if room_id_input.text:
-                success, message = join_room(room_id_input.text, current_user['username'])
+                success, message = join_room(room_id_input.text, username)
                 show_message(message, SUCCESS_COLOR if success else ERROR_COLOR)
                 if success:
                     current_room = mongo_db.get_room(room_id_input.text)
@@ -1141,7 +1658,7 @@ while running:
             show_message("Rooms refreshed")
         
         if start_game_btn.is_clicked(mouse_pos, event):
-            if current_room and current_room['creator'] == current_user['username']:
+            if current_room and current_room['creator'] == username:
                 # Start the game for all players in the room
                 mongo_db.update_room(current_room['room_id'], {'game_started': True})
                 initialize_quiz()
@@ -1151,8 +1668,8 @@ while running:
         if leave_room_btn.is_clicked(mouse_pos, event):
             if current_room:
                 # Remove player from room
-                if current_user['username'] in current_room.get('players', []):
-                    new_players = [p for p in current_room['players'] if p != current_user['username']]
+                if username in current_room.get('players', []):
+                    new_players = [p for p in current_room['players'] if p != username]
                     mongo_db.update_room(current_room['room_id'], {'players': new_players})
                     
                     # If room is empty, delete it
@@ -1160,6 +1677,7 @@ while running:
                         mongo_db.delete_room(current_room['room_id'])
                 
                 current_room = None
+                lobby_dirty = True
                 current_state = STATE_LOBBY
                 show_message("Left the room")
         
@@ -1172,10 +1690,10 @@ while running:
         if confirm_character_btn.is_clicked(mouse_pos, event):
             if selected_character:
                 # Save role and character to database
-                if mongo_db.update_user_role(current_user['username'], user_role, selected_character):
+                if mongo_db.update_user_role(username, user_role, selected_character):
                     # Also update the room with the player's character
                     if current_room:
-                        mongo_db.update_player_character_in_room(current_room['room_id'], current_user['username'], selected_character)
+                        mongo_db.update_player_character_in_room(current_room['room_id'], username, selected_character)
                     
                     show_message(f"Character {selected_character} selected! Your role is {selected_character}.", SUCCESS_COLOR)
                     current_state = STATE_GAME
@@ -1194,6 +1712,7 @@ while running:
     my_room_btn.check_hover(mouse_pos)
     continue_game_btn.check_hover(mouse_pos)
     logout_btn.check_hover(mouse_pos)
+    refresh_lobby_btn.check_hover(mouse_pos)
     join_with_id_btn.check_hover(mouse_pos)
     refresh_rooms_btn.check_hover(mouse_pos)
     start_game_btn.check_hover(mouse_pos)
@@ -1216,329 +1735,76 @@ while running:
     # Update message timer
     if message_timer > 0:
         message_timer -= 1
+        # The message only needs erasing once it expires
+        if message_timer == 0:
+            screen_dirty = True
     
-    # Refresh room data if in room
-    if current_state == STATE_ROOM and current_room:
-        updated_room = mongo_db.get_room(current_room['room_id'])
-        if updated_room:
-            current_room = updated_room
-            
-            # Auto-start quiz if game started
-            if updated_room.get('game_started', False) and current_state not in [STATE_QUIZ, STATE_VIDEO, STATE_ROLE_SELECTION, STATE_CHARACTER_CONFIRM, STATE_GAME]:
-                initialize_quiz()
-                current_state = STATE_VIDEO
+    # Refresh room data if in room, from the background watcher
+    watched_room_id = current_room['room_id'] if current_room and current_state in [STATE_ROOM, STATE_GAME] else None
+    if room_watcher and room_watcher.room_id != watched_room_id:
+        room_watcher.stop()
+        room_watcher = None
+    if watched_room_id and not room_watcher:
+        room_watcher = RoomWatcher(mongo_db, watched_room_id)
+    
+    updated_room = room_watcher.take_update() if room_watcher else None
+    if updated_room:
+        screen_dirty = True
+        current_room = updated_room
+        
+        # Auto-start quiz if game started
+        if updated_room.get('game_started', False) and current_state == STATE_ROOM:
+            initialize_quiz()
+            current_state = STATE_VIDEO
     
     # Handle video playback
     if current_state == STATE_VIDEO and video_playing:
+        # The progress bar animates while the video plays
+        screen_dirty = True
         # Check if video has finished playing
         if current_time - video_start_time >= video_duration:
             video_playing = False
             current_state = STATE_QUIZ
     
-    # Check My Room availability
-    if current_state == STATE_LOBBY:
-        check_my_room_availability()
-    
-    # Draw everything
-    screen.blit(background_image, (0, 0))
-    screen.blit(overlay, (0, 0))
+    # Refresh database status for the footer
+    if db_status_cache["checked_at"] is None or current_time - db_status_cache["checked_at"] >= DB_STATUS_INTERVAL:
+        db_connected = mongo_db.is_connected()
+        user_count = mongo_db.get_user_count() if db_connected else 0
+        old_footer = db_status_cache["footer"]
+        db_status_cache["checked_at"] = current_time
+        
+        # Re-render and redraw only when what the footer shows has changed
+        if old_footer is None or (db_connected, user_count) != (db_status_cache["connected"], db_status_cache["user_count"]):
+            db_status_cache.update(
+                connected=db_connected,
+                user_count=user_count,
+                footer=render_footer(db_connected, user_count)
+            )
+            footer_rect = db_status_cache["footer"].get_rect(topleft=(10, current_height - 50))
+            if old_footer:
+                footer_rect.union_ip(old_footer.get_rect(topleft=(10, current_height - 50)))
+            dirty_rects.append(footer_rect)
     
-    if current_state == STATE_MAIN:
-        # Draw main menu
-        title = font.render("Welcome to Game Lobby", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 100))
-        
-        sign_in_btn.draw(screen)
-        sign_up_btn.draw(screen)
-        
-    elif current_state == STATE_SIGN_UP:
-        # Draw sign up form
-        title = font.render("Create Account", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 100))
-        
-        signup_username.draw(screen)
-        signup_email.draw(screen)
-        signup_password.draw(screen)
-        signup_confirm.draw(screen)
-        
-        submit_btn.draw(screen)
-        back_btn.draw(screen)
-        
-    elif current_state == STATE_SIGN_IN:
-        # Draw sign in form
-        title = font.render("Sign In", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 100))
-        
-        signin_username.draw(screen)
-        signin_password.draw(screen)
-        
-        submit_btn.draw(screen)
-        back_btn.draw(screen)
+    # Check My Room availability once on entering the lobby or on refresh
+    if current_state == STATE_LOBBY and lobby_dirty:
+        refresh_lobby()
+        screen_dirty = True
     
-    elif current_state == STATE_LOBBY:
-        # Draw lobby
-        welcome_text = font.render(f"Welcome, {current_user['username']}!", True, TEXT_COLOR)
-        screen.blit(welcome_text, (current_width//2 - welcome_text.get_width()//2, 100))
-        
-        instruction = small_font.render("Choose an option below:", True, TEXT_COLOR)
-        screen.blit(instruction, (current_width//2 - instruction.get_width()//2, 160))
+    # Draw everything, but only when something on screen may have changed
+    if screen_dirty or dirty_rects:
+        draw_screen(current_width, current_height, current_time)
         
-        create_room_btn.draw(screen)
-        join_room_btn.draw(screen)
-        
-        # Show My Room button if available
-        if my_room_available:
-            my_room_btn.draw(screen)
-            room_info = tiny_font.render(f"Your room: {current_user.get('last_room', 'Unknown')}", True, SUCCESS_COLOR)
-            screen.blit(room_info, (current_width//2 - room_info.get_width()//2, HEIGHT - 180))
+        if screen_dirty:
+            pygame.display.flip()
         else:
-            no_room_text = tiny_font.render("No active room to rejoin", True, WARNING_COLOR)
-            screen.blit(no_room_text, (current_width//2 - no_room_text.get_width()//2, HEIGHT - 180))
-        
-        # Show Continue Game button if user has a character
-        user_data = mongo_db.find_user({"username": current_user['username']})
-        if user_data and user_data.get('character'):
-            continue_game_btn.draw(screen)
-            continue_info = tiny_font.render(f"Continue as {user_data.get('character')}", True, SUCCESS_COLOR)
-            screen.blit(continue_info, (current_width//2 - continue_info.get_width()//2, HEIGHT - 130))
-        
-        logout_btn.draw(screen)
-    
-    elif current_state == STATE_JOIN_ROOM:
-        # Draw join room interface
-        title = font.render("Join a Room", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 80))
-        
-        # Room ID input
-        room_id_label = small_font.render("Enter Room ID:", True, TEXT_COLOR)
-        screen.blit(room_id_label, (current_width//2 - 150, 220))
-        room_id_input.draw(screen)
-        join_with_id_btn.draw(screen)
-        
-        # Available rooms
-        rooms_label = small_font.render("Available Rooms:", True, TEXT_COLOR)
-        screen.blit(rooms_label, (current_width//2 - rooms_label.get_width()//2, 320))
-        
-        for room_btn in room_buttons:
-            room_btn.draw(screen)
-        
-        refresh_rooms_btn.draw(screen)
-        back_btn.draw(screen)
-    
-    elif current_state == STATE_ROOM:
-        # Draw room interface
-        title = font.render(f"Room: {current_room['room_id']}", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 80))
-        
-        # Room creator
-        creator_text = small_font.render(f"Created by: {current_room['creator']}", True, TEXT_COLOR)
-        screen.blit(creator_text, (current_width//2 - creator_text.get_width()//2, 130))
-        
-        # Players list
-        players_label = small_font.render("Players:", True, TEXT_COLOR)
-        screen.blit(players_label, (current_width//2 - 200, 180))
-        
-        player_characters = current_room.get('player_characters', {})
-        
-        for i, player in enumerate(current_room.get('players', [])):
-            character = player_characters.get(player, "Not selected")
-            player_text = small_font.render(f"{i+1}. {player} - {character}", True, TEXT_COLOR)
-            screen.blit(player_text, (current_width//2 - 180, 220 + i * 40))
-        
-        # Show start button only for room creator
-        if current_room['creator'] == current_user['username'] and not current_room.get('game_started', False):
-            start_game_btn.draw(screen)
-        
-        leave_room_btn.draw(screen)
-        
-        # Show game status
-        if current_room.get('game_started', False):
-            status_text = small_font.render("Game in progress...", True, SUCCESS_COLOR)
-            screen.blit(status_text, (current_width//2 - status_text.get_width()//2, HEIGHT - 200))
-    
-    elif current_state == STATE_VIDEO:
-        # Draw video playback interface
-        title = font.render(f"Question {current_question + 1} of {len(QUESTIONS)}", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 80))
-        
-        # Video placeholder
-        video_rect = pygame.Rect(current_width//2 - 200, 150, 400, 300)
-        pygame.draw.rect(screen, (30, 30, 30), video_rect)
-        pygame.draw.rect(screen, (100, 100, 100), video_rect, 2)
-        
-        video_text = small_font.render("Video Playing...", True, TEXT_COLOR)
-        screen.blit(video_text, (current_width//2 - video_text.get_width()//2, 160))
-        
-        # Show video progress
-        if video_playing:
-            progress = min(1.0, (current_time - video_start_time) / video_duration)
-            progress_width = int(360 * progress)
-            progress_rect = pygame.Rect(current_width//2 - 180, 470, progress_width, 20)
-            pygame.draw.rect(screen, SUCCESS_COLOR, progress_rect)
-            pygame.draw.rect(screen, (200, 200, 200), (current_width//2 - 180, 470, 360, 20), 2)
-        
-        skip_video_btn.draw(screen)
-        
-        # Auto-advance notification
-        auto_text = tiny_font.render("Video will auto-advance to question when finished", True, (150, 150, 150))
-        screen.blit(auto_text, (current_width//2 - auto_text.get_width()//2, HEIGHT - 120))
-    
-    elif current_state == STATE_QUIZ:
-        # Draw quiz interface
-        if current_question < len(QUESTIONS):
-            question_data = QUESTIONS[current_question]
-            
-            # Question number
-            q_num_text = font.render(f"Question {current_question + 1} of {len(QUESTIONS)}", True, TEXT_COLOR)
-            screen.blit(q_num_text, (current_width//2 - q_num_text.get_width()//2, 80))
-            
-            # Question text (wrapped)
-            question_lines = []
-            words = question_data["question"].split(' ')
-            current_line = []
-            
-            for word in words:
-                test_line = ' '.join(current_line + [word])
-                test_width = question_font.size(test_line)[0]
-                if test_width < current_width - 100:
-                    current_line.append(word)
-                else:
-                    question_lines.append(' '.join(current_line))
-                    current_line = [word]
-            if current_line:
-                question_lines.append(' '.join(current_line))
-            
-            for i, line in enumerate(question_lines):
-                q_text = question_font.render(line, True, TEXT_COLOR)
-                screen.blit(q_text, (current_width//2 - q_text.get_width()//2, 130 + i * 30))
-            
-            # Draw option buttons
-            for option_btn in option_buttons:
-                option_btn.draw(screen)
-            
-            # Auto-advance notification
-            auto_text = tiny_font.render("Select an option to automatically continue", True, (150, 150, 150))
-            screen.blit(auto_text, (current_width//2 - auto_text.get_width()//2, HEIGHT - 120))
-            
-            back_btn.draw(screen)
-    
-    elif current_state == STATE_ROLE_SELECTION:
-        # Draw role selection interface
-        title = font.render("Choose Your Character", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 80))
-        
-        role_text = small_font.render(f"Your Role: {user_role}", True, SUCCESS_COLOR)
-        screen.blit(role_text, (current_width//2 - role_text.get_width()//2, 130))
-        
-        instruction = small_font.render("Select your character from the options below:", True, TEXT_COLOR)
-        screen.blit(instruction, (current_width//2 - instruction.get_width()//2, 160))
-        
-        # Draw character buttons
-        for char_btn in character_buttons:
-            char_btn.draw(screen)
-        
-        select_character_btn.draw(screen)
-        
-        if selected_character:
-            selected_text = small_font.render(f"Selected: {selected_character}", True, SUCCESS_COLOR)
-            screen.blit(selected_text, (current_width//2 - selected_text.get_width()//2, current_height - 120))
-        
-        back_btn.draw(screen)
-    
-    elif current_state == STATE_CHARACTER_CONFIRM:
-        # Draw character confirmation interface
-        title = font.render("Confirm Your Character", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 80))
-        
-        # Show selected character image and name
-        if selected_character_data:
-            try:
-                char_img = pygame.image.load(selected_character_data['path'])
-                char_img = pygame.transform.scale(char_img, (200, 200))
-                screen.blit(char_img, (current_width//2 - 100, 150))
-            except:
-                # Placeholder if image not found
-                placeholder = pygame.Surface((200, 200))
-                placeholder.fill((100, 100, 100))
-                screen.blit(placeholder, (current_width//2 - 100, 150))
-        
-        confirm_text = font.render(f"Your Role: {selected_character}", True, SUCCESS_COLOR)
-        screen.blit(confirm_text, (current_width//2 - confirm_text.get_width()//2, 370))
-        
-        instruction = small_font.render("This will be your character for the game. Confirm your choice?", True, TEXT_COLOR)
-        screen.blit(instruction, (current_width//2 - instruction.get_width()//2, 420))
-        
-        confirm_character_btn.draw(screen)
-        back_btn.draw(screen)
-    
-    elif current_state == STATE_GAME:
-        # Draw game interface
-        title = font.render("Game Started!", True, TEXT_COLOR)
-        screen.blit(title, (current_width//2 - title.get_width()//2, 80))
-        
-        # Show character image and role
-        if selected_character_data:
-            try:
-                char_img = pygame.image.load(selected_character_data['path'])
-                char_img = pygame.transform.scale(char_img, (200, 200))
-                screen.blit(char_img, (current_width//2 - 100, 150))
-            except:
-                # Placeholder if image not found
-                placeholder = pygame.Surface((200, 200))
-                placeholder.fill((100, 100, 100))
-                placeholder_text = small_font.render(selected_character, True, TEXT_COLOR)
-                text_rect = placeholder_text.get_rect(center=(100, 100))
-                placeholder.blit(placeholder_text, text_rect)
-                screen.blit(placeholder, (current_width//2 - 100, 150))
-        
-        role_text = font.render(f"Your Role: {selected_character}", True, SUCCESS_COLOR)
-        screen.blit(role_text, (current_width//2 - role_text.get_width()//2, 370))
-        
-        # Show other players in the room
-        if current_room:
-            players_label = small_font.render("Players in your room:", True, TEXT_COLOR)
-            screen.blit(players_label, (current_width//2 - players_label.get_width()//2, 420))
-            
-            player_characters = current_room.get('player_characters', {})
-            y_offset = 460
-            
-            for i, player in enumerate(current_room.get('players', [])):
-                if player != current_user['username']:
-                    character = player_characters.get(player, "Choosing character...")
-                    player_text = small_font.render(f"{player}: {character}", True, TEXT_COLOR)
-                    screen.blit(player_text, (current_width//2 - player_text.get_width()//2, y_offset))
-                    y_offset += 40
-            
-            # Show waiting message if not all players have characters
-            if len(player_characters) < len(current_room.get('players', [])):
-                wait_text = small_font.render("Waiting for other players to choose characters...", True, WARNING_COLOR)
-                screen.blit(wait_text, (current_width//2 - wait_text.get_width()//2, y_offset + 20))
-    
-    # Draw message if any
-    if message_text and message_timer > 0:
-        msg_surf = small_font.render(message_text, True, message_color)
-        screen.blit(msg_surf, (current_width//2 - msg_surf.get_width()//2, current_height - 200))
-    
-    # Draw database status and user count
-    db_status = "MongoDB: Connected" if mongo_db.is_connected() else "MongoDB: Disconnected"
-    status_color = SUCCESS_COLOR if mongo_db.is_connected() else ERROR_COLOR
-    
-    status_text = tiny_font.render(db_status, True, status_color)
-    screen.blit(status_text, (10, current_height - 50))
-    
-    if mongo_db.is_connected():
-        user_count = mongo_db.get_user_count()
-        count_text = tiny_font.render(f"Total Users: {user_count}", True, (150, 150, 150))
-        screen.blit(count_text, (10, current_height - 30))
-    else:
-        # Show connection help message
-        help_text = tiny_font.render("Check .env file and MongoDB connection", True, WARNING_COLOR)
-        screen.blit(help_text, (10, current_height - 30))
-    
-    pygame.display.flip()
-    clock.tick(60)
+            pygame.display.update(dirty_rects)
+        screen_dirty = False
+        dirty_rects = []
+    clock.tick(FPS)
 
 # Close MongoDB connection when exiting
+if room_watcher:
+    room_watcher.stop()
 if mongo_db.client:
     mongo_db.client.close()
     safe_print("MongoDB connection closed.")
@@ -1,19 +1,205 @@
-import socket
-import threading
-import json
+import asyncio
+import base64
+import copy
+import functools
+import logging
+import logging.handlers
+import multiprocessing
 import os
+import orjson
 import re
-import random
+import queue
+import secrets
+import socket
 import string
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from pymongo.errors import ConnectionFailure, DuplicateKeyError
 import bcrypt
 from dotenv import load_dotenv
+from encoders import (
+    GET_ROOMS_TEMPLATE,
+    ROOMS_UPDATED_TEMPLATE,
+    encode_error,
+    encode_message,
+    encode_room_list,
+    encode_room_patch
+)
+
+# libuv-based event loop where available (not on Windows); asyncio's own loop otherwise
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger('gameserver')
+
+def setup_logging():
+    """Send server logs through a queue; a listener thread does the formatting and writing,
+    so the event loop never waits on stdout. LOG_LEVEL=DEBUG also logs every received action.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    listener.start()
+    return listener
+
+# Every message on the wire is one line of JSON (orjson never emits a raw newline inside it)
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+# Number of quiz questions; every player's answers are stored in a list of this length
+QUESTION_COUNT = 5
+
+# Quiz answers 'A'-'F' and the role each one leads to, in tie-break order
+ANSWER_OPTIONS = ('A', 'B', 'C', 'D', 'E', 'F')
+ROLES = (
+    'Barbarian / Monk (Melee DPS)',
+    'Fighter/Knight (Tank)',
+    'Rogue / Scout-Ranger (Stealth/Agile)',
+    'Gunman / Ranger (Ranged Physical)',
+    'Bard / Priest / Alchemist (Support/Healing)',
+    'Wizard / Druids / Necromancer / Elementalist / Summoner / Sorcerer / Warlock (Magical Combatants)'
+)
+
+ROOM_ID_ALPHABET = string.ascii_uppercase + string.digits
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', re.ASCII)
+
+# Room fields the lobby room list needs
+ROOM_LIST_FIELDS = ("room_id", "creator", "players", "max_players", "game_started")
+
+# Room keys that can appear in a dotted $set path as-is
+DOTTED_PATH_KEY = re.compile(r'^[^.$][^.]*$')
+
+# Pending connection queue; asyncio also accepts up to this many connections per wakeup
+LISTEN_BACKLOG = 1024
+
+# Kernel send buffer per client socket, enough to queue a burst of broadcasts without blocking
+SEND_BUFFER_SIZE = 65536
+
+# Seconds between flushes of buffered room and user profile updates to MongoDB
+ROOM_FLUSH_INTERVAL = 0.02
+USER_FLUSH_INTERVAL = 1.0
+
+# Seconds the lobby room list waits so a burst of room changes goes out as one broadcast
+ROOM_LIST_DELAY = 0.005
+
+# Responses that never vary, encoded once at import
+SIGN_UP_RESPONSE = encode_message({
+    'action': 'sign_up_response',
+    'status': 'success',
+    'message': 'Account created successfully!'
+})
+START_GAME_RESPONSE = encode_message({
+    'action': 'start_game_response',
+    'status': 'success',
+    'message': "Game started! All players will now begin the quiz."
+})
+SUBMIT_ANSWER_RESPONSE = encode_message({
+    'action': 'submit_answer_response',
+    'status': 'success',
+    'message': "Answer submitted successfully!"
+})
+LOCK_CHARACTER_RESPONSE = encode_message({
+    'action': 'lock_character_response',
+    'status': 'success',
+    'message': "Character locked! You cannot change it now."
+})
+LEAVE_ROOM_RESPONSE = encode_message({
+    'action': 'leave_room_response',
+    'status': 'success',
+    'message': "Left the room successfully"
+})
+ROLE_ASSIGNED_RESPONSES = {
+    role: encode_message({
+        'action': 'role_assigned',
+        'status': 'success',
+        'data': {
+            'role': role
+        },
+        'message': f"Your role is: {role}"
+    })
+    for role in ROLES
+}
+
+# bcrypt salts: cost factor and bcrypt's own base64 alphabet
+BCRYPT_ROUNDS = 12
+BCRYPT_BASE64 = bytes.maketrans(
+    b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/',
+    b'./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+)
+
+# Per-process pool of random bytes for salts, refilled 4 KB at a time
+salt_entropy = bytearray()
+
+def reset_salt_entropy():
+    """Worker initializer: never share buffered entropy inherited through fork"""
+    salt_entropy.clear()
+
+def fast_gensalt():
+    """Same format as bcrypt.gensalt(), without a urandom call for every salt"""
+    if len(salt_entropy) < 16:
+        salt_entropy.extend(os.urandom(4096))
+    raw = bytes(salt_entropy[:16])
+    del salt_entropy[:16]
+    return b'$2b$%02d$' % BCRYPT_ROUNDS + base64.b64encode(raw)[:22].translate(BCRYPT_BASE64)
+
+def hash_password(password):
+    """Hash a password with a fresh salt; runs in the bcrypt worker processes"""
+    return bcrypt.hashpw(password, fast_gensalt())
+
+@dataclass(slots=True, eq=False)
+class ClientState:
+    """Connection and session state for one connected client; hashed by identity for room membership"""
+    writer: asyncio.StreamWriter
+    username: str | None = None
+    room_id: str | None = None
+    character_locked: bool = False
+    room_version: int | None = None
+    outbox: bytearray = field(default_factory=bytearray)
+
+@dataclass(slots=True)
+class RoomState:
+    """In-memory copy of a room document"""
+    room_id: str
+    creator: str
+    players: list = field(default_factory=list)
+    player_characters: dict = field(default_factory=dict)
+    player_answers: dict = field(default_factory=dict)
+    player_roles: dict = field(default_factory=dict)
+    character_locked: dict = field(default_factory=dict)
+    is_active: bool = True
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    max_players: int = 4
+    game_started: bool = False
+    game_finished: bool = False
+    current_question: int = 0
+    version: int = 0
+    
+    @classmethod
+    def from_document(cls, document):
+        """Build from a MongoDB room document, ignoring fields the server does not track.
+        
+        Rooms saved before answers became fixed-size lists hold shorter lists; pad them.
+        """
+        room = cls(**{f.name: document[f.name] for f in fields(cls) if f.name in document})
+        for answers in room.player_answers.values():
+            answers.extend([None] * (QUESTION_COUNT - len(answers)))
+        return room
+    
+    def to_document(self):
+        return asdict(self)
+
 class GameServer:
     def __init__(self, host='0.0.0.0', port=int(os.getenv('PORT'))):
         self.host = host
@@ -21,12 +207,43 @@ class GameServer:
         self.server = None
         self.clients = {}
         self.rooms = {}
+        self.room_members = {}
+        self.room_locks = {}
+        self.pending_writes = set()
+        self.pending_room_updates = {}
+        self.pending_user_updates = {}
+        self.flush_tasks = []
+        self.room_payloads = {}
+        self.room_list_payloads = {}
+        self.room_list_timer = None
+        self.room_patches = {}
+        self.outbox_queue = []
+        self.db_writer = ThreadPoolExecutor(max_workers=1)
+        # Spawned, not forked: a worker forked after clients connect would hold copies of their
+        # sockets, and closing a connection here would then never reach the client
+        self.bcrypt_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=reset_salt_entropy
+        )
         self.setup_database()
         
     def setup_database(self):
         """Initialize MongoDB connection"""
         try:
-            self.mongo_client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+            # Keep a warm pool for bursts such as game start. Every server process opens up to
+            # maxPoolSize connections per replica set member, so keep
+            # processes x maxPoolSize below mongod's net.maxIncomingConnections.
+            self.mongo_client = MongoClient(
+                os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'),
+                maxPoolSize=50,
+                minPoolSize=10,
+                maxIdleTimeMS=60000,
+                serverSelectionTimeoutMS=2000,
+                retryWrites=True,
+                # zlib ships with Python; zstd/snappy would need extra packages
+                compressors="zlib"
+            )
             self.db = self.mongo_client[os.getenv('DATABASE_NAME', 'game_auth')]
             self.users_collection = self.db.users
             self.rooms_collection = self.db.rooms
@@ -35,70 +252,219 @@ class GameServer:
             self.users_collection.create_index("username", unique=True)
             self.users_collection.create_index("email", unique=True)
             self.rooms_collection.create_index("room_id", unique=True)
+            self.rooms_collection.create_index([("is_active", 1), ("room_id", 1)])
+            
+            # Rooms live in memory from here on; MongoDB only receives writes
+            self.rooms = {
+                document['room_id']: RoomState.from_document(document)
+                for document in self.rooms_collection.find({"is_active": True})
+            }
+            self.room_locks = {room_id: asyncio.Lock() for room_id in self.rooms}
             
-            print("✅ Database connected successfully")
+            logger.info("✅ Database connected successfully")
         except Exception as e:
-            print(f"❌ Database connection failed: {e}")
+            logger.error("❌ Database connection failed: %s", e)
             exit(1)
 
-    def start_server(self):
+    async def run_db(self, func, *args, **kwargs):
+        """Run a blocking PyMongo call on the default executor so the event loop keeps serving clients"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    def write_behind(self, func, *args, **kwargs):
+        """Start a database write without waiting for the acknowledgement; failures are logged.
+        
+        Writes go through a single worker thread so they reach MongoDB in the order they were made.
+        """
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self.db_writer, functools.partial(func, *args, **kwargs))
+        self.pending_writes.add(task)
+        task.add_done_callback(self.finish_write)
+
+    def finish_write(self, task):
+        self.pending_writes.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error("❌ Database write failed: %s", task.exception())
+
+    def update_room(self, room_id, patches):
+        """Record a change already applied to self.rooms, as {"op": "set"|"del", "path": [...], "val": ...} patches.
+        
+        Each call bumps the room version; the next broadcast ships every patch since the last one
+        and the next flush writes each patch as a dotted-path $set or $unset.
+        """
+        room = self.rooms[room_id]
+        self.room_patches.setdefault(room_id, (room.version, []))[1].extend(patches)
+        room.version += 1
+        self.room_payloads.pop(room_id, None)
+        self.room_list_payloads.clear()
+        
+        pending = self.pending_room_updates.setdefault(room_id, {})
+        for patch in patches:
+            name = patch['path'][0]
+            path = '.'.join(map(str, patch['path']))
+            overlapping = [
+                key for key in pending
+                if key != path and (key.startswith(path + '.') or path.startswith(key + '.'))
+            ]
+            if overlapping or not all(DOTTED_PATH_KEY.match(str(key)) for key in patch['path']):
+                # One update can't touch a path and its parent, and keys with dots or a leading $
+                # can't be addressed by path; write the whole top-level field from memory instead
+                for key in [key for key in pending if key == name or key.startswith(name + '.')]:
+                    del pending[key]
+                pending[name] = ('set', copy.deepcopy(getattr(room, name)))
+            else:
+                pending[path] = (patch['op'], copy.deepcopy(patch.get('val')))
+
+    def delete_room(self, room_id):
+        """Drop a room from memory and MongoDB, discarding any buffered updates for it"""
+        self.pending_room_updates.pop(room_id, None)
+        self.room_payloads.pop(room_id, None)
+        self.room_patches.pop(room_id, None)
+        self.room_list_payloads.clear()
+        self.write_behind(self.rooms_collection.delete_one, {"room_id": room_id})
+        del self.rooms[room_id]
+        self.room_members.pop(room_id, None)
+        self.room_locks.pop(room_id, None)
+
+    def flush_room_updates(self):
+        """Send every buffered room update to MongoDB in one unordered bulk write"""
+        if not self.pending_room_updates:
+            return
+        operations = []
+        for room_id, pending in self.pending_room_updates.items():
+            update = {}
+            for path, (op, value) in pending.items():
+                if op == 'set':
+                    update.setdefault("$set", {})[path] = value
+                else:
+                    update.setdefault("$unset", {})[path] = ""
+            operations.append(UpdateOne({"room_id": room_id}, update))
+        self.pending_room_updates = {}
+        self.write_behind(self.rooms_collection.bulk_write, operations, ordered=False)
+
+    def update_user(self, username, fields):
+        """Buffer informational profile fields (last login, last room, character) for the next flush"""
+        self.pending_user_updates.setdefault(username, {}).update(fields)
+
+    def flush_user_updates(self):
+        """Send every buffered profile update to MongoDB in one unordered bulk write"""
+        if not self.pending_user_updates:
+            return
+        operations = [
+            UpdateOne({"username": username}, {"$set": fields})
+            for username, fields in self.pending_user_updates.items()
+        ]
+        self.pending_user_updates = {}
+        self.write_behind(self.users_collection.bulk_write, operations, ordered=False)
+
+    async def flush_periodically(self, flush, interval):
+        """Call flush every interval seconds, coalescing what was buffered in between"""
+        while True:
+            await asyncio.sleep(interval)
+            flush()
+
+    def room_list_payload(self, template):
+        """Encoded room list message built from the in-memory rooms.
+        
+        Cached per template until a room is created, changed or deleted, so get_rooms
+        and every rooms_updated broadcast between changes share one serialization.
+        """
+        payload = self.room_list_payloads.get(template)
+        if payload is None:
+            rooms = [
+                {name: getattr(room, name) for name in ROOM_LIST_FIELDS}
+                for room in self.rooms.values() if room.is_active
+            ]
+            payload = self.room_list_payloads[template] = encode_room_list(template, rooms)
+        return payload
+
+    async def run_bcrypt(self, func, *args):
+        """Run a bcrypt hash or check in the worker processes, off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.bcrypt_pool, func, *args)
+
+    def room_lock(self, room_id):
+        """Lock serializing read-modify-write handlers on one room.
+        
+        Locks live exactly as long as their room; a room that no longer exists gets an
+        unshared lock, and the handler then finds no room and reports it.
+        """
+        return self.room_locks.get(room_id) or asyncio.Lock()
+
+    async def start_server(self):
         """Start the game server"""
         try:
-            self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server.bind((self.host, self.port))
-            self.server.listen(5)
-            print(f"🎮 Game server started on {self.host}:{self.port}")
+            self.server = await asyncio.start_server(
+                self.handle_client, self.host, self.port, backlog=LISTEN_BACKLOG, limit=MAX_MESSAGE_SIZE
+            )
+            self.flush_tasks = [
+                asyncio.create_task(self.flush_periodically(self.flush_room_updates, ROOM_FLUSH_INTERVAL)),
+                asyncio.create_task(self.flush_periodically(self.flush_user_updates, USER_FLUSH_INTERVAL))
+            ]
+            logger.info("🎮 Game server started on %s:%s", self.host, self.port)
             
-            while True:
-                client_socket, address = self.server.accept()
-                print(f"🔗 New connection from {address}")
-                
-                client_handler = threading.Thread(
-                    target=self.handle_client,
-                    args=(client_socket, address)
-                )
-                client_handler.daemon = True
-                client_handler.start()
+            async with self.server:
+                try:
+                    await self.server.serve_forever()
+                finally:
+                    # Leaving the async with waits for open connections (Python 3.12.1+),
+                    # so stop accepting and disconnect clients before it does
+                    self.server.close()
+                    await self.disconnect_many(list(self.clients))
                 
         except Exception as e:
-            print(f"❌ Server error: {e}")
+            logger.error("❌ Server error: %s", e)
         finally:
-            if self.server:
-                self.server.close()
+            self.flush_room_updates()
+            self.flush_user_updates()
+            self.bcrypt_pool.shutdown()
+            self.db_writer.shutdown()
 
-    def handle_client(self, client_socket, address):
+    async def handle_client(self, reader, writer):
         """Handle individual client connections"""
+        address = writer.get_extra_info('peername')
+        logger.info("🔗 New connection from %s", address)
+        
+        # Broadcasts are small and chained; don't let Nagle hold them back waiting for ACKs
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_SIZE)
+        
         client_id = f"{address[0]}:{address[1]}"
-        self.clients[client_id] = {
-            'socket': client_socket,
-            'username': None,
-            'room_id': None,
-            'character_locked': False
-        }
+        client_data = self.clients[client_id] = ClientState(writer)
+        abort = False
         
         try:
             while True:
-                data = client_socket.recv(4096).decode('utf-8')
-                if not data:
+                try:
+                    data = await reader.readuntil(b'\n')
+                except asyncio.LimitOverrunError:
+                    self.send_error(client_data, "Message too large")
                     break
                     
                 try:
-                    message = json.loads(data)
-                    self.process_message(client_id, message)
-                except json.JSONDecodeError:
-                    self.send_error(client_socket, "Invalid JSON format")
+                    message = orjson.loads(data)
+                    await self.process_message(client_id, message)
+                except orjson.JSONDecodeError:
+                    self.send_error(client_data, "Invalid JSON format")
+                
+                await writer.drain()
                     
+        except asyncio.IncompleteReadError:
+            pass
         except Exception as e:
-            print(f"❌ Client {client_id} error: {e}")
+            logger.error("❌ Client %s error: %s", client_id, e)
+            abort = True
         finally:
-            self.disconnect_client(client_id)
+            await self.disconnect_client(client_id, abort)
 
-    def process_message(self, client_id, message):
+    async def process_message(self, client_id, message):
         """Process incoming messages from clients"""
         action = message.get('action')
         data = message.get('data', {})
         
-        print(f"📨 Received {action} from {client_id}")
+        logger.debug("📨 Received %s from %s", action, client_id)
         
         handler_map = {
             'sign_up': self.handle_sign_up,
@@ -116,89 +482,95 @@ class GameServer:
         
         handler = handler_map.get(action)
         if handler:
-            handler(client_id, data)
+            await handler(client_id, data)
         else:
-            self.send_error(self.clients[client_id]['socket'], f"Unknown action: {action}")
+            self.send_error(self.clients[client_id], f"Unknown action: {action}")
 
     # Authentication Handlers
-    def handle_sign_up(self, client_id, data):
+    async def handle_sign_up(self, client_id, data):
         """Handle user registration"""
         username = data.get('username')
         email = data.get('email')
         password = data.get('password')
         confirm_password = data.get('confirm_password')
         
-        if not all([username, email, password, confirm_password]):
-            self.send_error(self.clients[client_id]['socket'], "All fields are required")
+        if not (username and email and password and confirm_password):
+            self.send_error(self.clients[client_id], "All fields are required")
             return
             
         if password != confirm_password:
-            self.send_error(self.clients[client_id]['socket'], "Passwords do not match")
+            self.send_error(self.clients[client_id], "Passwords do not match")
             return
             
         if not self.validate_email(email):
-            self.send_error(self.clients[client_id]['socket'], "Invalid email format")
+            self.send_error(self.clients[client_id], "Invalid email format")
             return
             
         if len(password) < 6:
-            self.send_error(self.clients[client_id]['socket'], "Password must be at least 6 characters")
+            self.send_error(self.clients[client_id], "Password must be at least 6 characters")
             return
             
         try:
             # Check if username or email already exists
-            if self.users_collection.find_one({"$or": [{"username": username}, {"email": email}]}):
-                self.send_error(self.clients[client_id]['socket'], "Username or email already exists")
+            if await self.run_db(self.users_collection.find_one, {"$or": [{"username": username}, {"email": email}]}):
+                self.send_error(self.clients[client_id], "Username or email already exists")
                 return
                 
             # Create user
+            password_hash = await self.run_bcrypt(hash_password, password.encode('utf-8'))
             user_data = {
                 "username": username,
                 "email": email,
-                "password_hash": bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()),
+                "password_hash": password_hash,
                 "created_at": datetime.utcnow(),
                 "last_login": None,
                 "last_room": None
             }
             
-            result = self.users_collection.insert_one(user_data)
+            result = await self.run_db(self.users_collection.insert_one, user_data)
             
-            response = {
-                'action': 'sign_up_response',
-                'status': 'success',
-                'message': 'Account created successfully!'
-            }
-            self.send_message(self.clients[client_id]['socket'], response)
+            self.send_payload(self.clients[client_id], SIGN_UP_RESPONSE)
             
         except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Registration failed: {str(e)}")
+            self.send_error(self.clients[client_id], f"Registration failed: {str(e)}")
 
-    def handle_sign_in(self, client_id, data):
+    async def handle_sign_in(self, client_id, data):
         """Handle user login"""
         username = data.get('username')
         password = data.get('password')
         
         if not username or not password:
-            self.send_error(self.clients[client_id]['socket'], "All fields are required")
+            self.send_error(self.clients[client_id], "All fields are required")
             return
             
         try:
             # Find user by username or email
-            user = self.users_collection.find_one({
+            user = await self.run_db(self.users_collection.find_one, {
                 "$or": [
                     {"username": username},
                     {"email": username}
                 ]
             })
             
-            if user and bcrypt.checkpw(password.encode('utf-8'), user["password_hash"]):
+            if user and await self.run_bcrypt(bcrypt.checkpw, password.encode('utf-8'), user["password_hash"]):
+                # Profile updates not yet flushed are newer than the stored document
+                user.update(self.pending_user_updates.get(user['username'], {}))
+                
                 # Update last login
-                self.users_collection.update_one(
-                    {"_id": user["_id"]},
-                    {"$set": {"last_login": datetime.utcnow()}}
-                )
+                self.update_user(user['username'], {"last_login": datetime.utcnow()})
+                
+                # Logging out on the client doesn't leave the room; do it before switching users
+                client_data = self.clients[client_id]
+                room_id = client_data.room_id
+                if room_id:
+                    async with self.room_lock(room_id):
+                        room = self.rooms.get(room_id)
+                        if room and self.remove_from_room(room, [client_data]):
+                            await self.broadcast_room_update(room_id)
+                    await self.broadcast_room_list()
                 
                 # Store user info in client data
-                self.clients[client_id]['username'] = user['username']
+                client_data.username = user['username']
                 
                 response = {
                     'action': 'sign_in_response',
@@ -210,51 +582,43 @@ class GameServer:
                     },
                     'message': f"Welcome back, {user['username']}!"
                 }
-                self.send_message(self.clients[client_id]['socket'], response)
+                self.send_message(self.clients[client_id], response)
             else:
-                self.send_error(self.clients[client_id]['socket'], "Invalid username/email or password")
+                self.send_error(self.clients[client_id], "Invalid username/email or password")
                 
         except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Login failed: {str(e)}")
+            self.send_error(self.clients[client_id], f"Login failed: {str(e)}")
 
     # Room Management Handlers
-    def handle_create_room(self, client_id, data):
+    async def handle_create_room(self, client_id, data):
         """Handle room creation"""
-        username = self.clients[client_id].get('username')
+        username = self.clients[client_id].username
         if not username:
-            self.send_error(self.clients[client_id]['socket'], "You must be logged in to create a room")
+            self.send_error(self.clients[client_id], "You must be logged in to create a room")
+            return
+            
+        # A client belongs to one room at a time, so broadcasts for its old room can't reach it
+        if self.clients[client_id].room_id:
+            self.send_error(self.clients[client_id], "Leave your current room first")
             return
             
         room_id = self.generate_room_id()
-        room_data = {
-            "room_id": room_id,
-            "creator": username,
-            "players": [username],
-            "player_characters": {},
-            "player_answers": {},
-            "player_roles": {},
-            "character_locked": {},
-            "is_active": True,
-            "created_at": datetime.utcnow(),
-            "max_players": 4,
-            "game_started": False,
-            "game_finished": False,
-            "current_question": 0
-        }
+        room_data = RoomState(room_id=room_id, creator=username, players=[username])
         
         try:
             # Save to database
-            self.rooms_collection.insert_one(room_data)
+            await self.run_db(self.rooms_collection.insert_one, room_data.to_document())
             
             # Update user's last room
-            self.users_collection.update_one(
-                {"username": username},
-                {"$set": {"last_room": room_id}}
-            )
+            self.update_user(username, {"last_room": room_id})
             
             # Store in memory
             self.rooms[room_id] = room_data
-            self.clients[client_id]['room_id'] = room_id
+            self.room_locks[room_id] = asyncio.Lock()
+            self.room_list_payloads.clear()
+            self.clients[client_id].room_id = room_id
+            self.clients[client_id].room_version = room_data.version
+            self.room_members.setdefault(room_id, set()).add(self.clients[client_id])
             
             response = {
                 'action': 'create_room_response',
@@ -265,417 +629,363 @@ class GameServer:
                 },
                 'message': f"Room {room_id} created successfully!"
             }
-            self.send_message(self.clients[client_id]['socket'], response)
+            self.send_message(self.clients[client_id], response)
             
             # Notify all clients about room list update
-            self.broadcast_room_list()
+            await self.broadcast_room_list()
             
         except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Room creation failed: {str(e)}")
+            self.send_error(self.clients[client_id], f"Room creation failed: {str(e)}")
 
-    def handle_join_room(self, client_id, data):
+    async def handle_join_room(self, client_id, data):
         """Handle joining a room"""
-        username = self.clients[client_id].get('username')
+        username = self.clients[client_id].username
         room_id = data.get('room_id')
         
         if not username:
-            self.send_error(self.clients[client_id]['socket'], "You must be logged in to join a room")
+            self.send_error(self.clients[client_id], "You must be logged in to join a room")
             return
             
         if not room_id:
-            self.send_error(self.clients[client_id]['socket'], "Room ID is required")
+            self.send_error(self.clients[client_id], "Room ID is required")
             return
             
-        try:
-            # Get room from database
-            room = self.rooms_collection.find_one({"room_id": room_id})
-            if not room:
-                self.send_error(self.clients[client_id]['socket'], "Room not found")
-                return
+        if self.clients[client_id].room_id:
+            if self.clients[client_id].room_id == room_id:
+                self.send_error(self.clients[client_id], "You are already in this room")
+            else:
+                self.send_error(self.clients[client_id], "Leave your current room first")
+            return
+            
+        if room_id not in self.rooms:
+            self.send_error(self.clients[client_id], "Room not found")
+            return
+            
+        async with self.room_lock(room_id):
+            try:
+                room = self.rooms.get(room_id)
+                if not room:
+                    self.send_error(self.clients[client_id], "Room not found")
+                    return
+                    
+                if not room.is_active:
+                    self.send_error(self.clients[client_id], "Room is not active")
+                    return
+                    
+                if username in room.players:
+                    self.send_error(self.clients[client_id], "You are already in this room")
+                    return
+                    
+                if len(room.players) >= room.max_players:
+                    self.send_error(self.clients[client_id], "Room is full")
+                    return
+                    
+                # Add player to room
+                room.players.append(username)
+                self.update_room(room_id, [
+                    {"op": "set", "path": ["players"], "val": list(room.players)}
+                ])
                 
-            if not room.get('is_active', True):
-                self.send_error(self.clients[client_id]['socket'], "Room is not active")
-                return
+                # Update user's last room
+                self.update_user(username, {"last_room": room_id})
                 
-            if username in room.get('players', []):
-                self.send_error(self.clients[client_id]['socket'], "You are already in this room")
-                return
+                # The joiner gets the full snapshot below, so the broadcast skips them
+                self.clients[client_id].room_id = room_id
+                self.clients[client_id].room_version = room.version
+                self.room_members.setdefault(room_id, set()).add(self.clients[client_id])
                 
-            if len(room.get('players', [])) >= room.get('max_players', 4):
-                self.send_error(self.clients[client_id]['socket'], "Room is full")
-                return
+                response = {
+                    'action': 'join_room_response',
+                    'status': 'success',
+                    'data': {
+                        'room_id': room_id,
+                        'room_data': room
+                    },
+                    'message': f"Joined room {room_id} successfully!"
+                }
+                self.send_message(self.clients[client_id], response)
                 
-            # Add player to room
-            updated_players = room.get('players', []) + [username]
-            self.rooms_collection.update_one(
-                {"room_id": room_id},
-                {"$set": {"players": updated_players}}
-            )
-            
-            # Update user's last room
-            self.users_collection.update_one(
-                {"username": username},
-                {"$set": {"last_room": room_id}}
-            )
-            
-            # Update in-memory data
-            if room_id in self.rooms:
-                self.rooms[room_id]['players'] = updated_players
-            else:
-                self.rooms[room_id] = room
-                self.rooms[room_id]['players'] = updated_players
+                # Notify all clients in the room
+                await self.broadcast_room_update(room_id)
+                await self.broadcast_room_list()
                 
-            self.clients[client_id]['room_id'] = room_id
-            
-            response = {
-                'action': 'join_room_response',
-                'status': 'success',
-                'data': {
-                    'room_id': room_id,
-                    'room_data': self.rooms[room_id]
-                },
-                'message': f"Joined room {room_id} successfully!"
-            }
-            self.send_message(self.clients[client_id]['socket'], response)
-            
-            # Notify all clients in the room
-            self.broadcast_room_update(room_id)
-            self.broadcast_room_list()
-            
-        except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Failed to join room: {str(e)}")
+            except Exception as e:
+                self.send_error(self.clients[client_id], f"Failed to join room: {str(e)}")
 
-    def handle_get_rooms(self, client_id, data):
+    async def handle_get_rooms(self, client_id, data):
         """Handle request for room list"""
         try:
-            rooms = list(self.rooms_collection.find({"is_active": True}))
-            
-            response = {
-                'action': 'get_rooms_response',
-                'status': 'success',
-                'data': {
-                    'rooms': rooms
-                }
-            }
-            self.send_message(self.clients[client_id]['socket'], response)
+            self.send_payload(self.clients[client_id], self.room_list_payload(GET_ROOMS_TEMPLATE))
             
         except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Failed to get rooms: {str(e)}")
+            self.send_error(self.clients[client_id], f"Failed to get rooms: {str(e)}")
 
-    def handle_start_game(self, client_id, data):
+    async def handle_start_game(self, client_id, data):
         """Handle starting the game in a room"""
-        username = self.clients[client_id].get('username')
-        room_id = self.clients[client_id].get('room_id')
+        username = self.clients[client_id].username
+        room_id = self.clients[client_id].room_id
         
         if not username or not room_id:
-            self.send_error(self.clients[client_id]['socket'], "You must be in a room to start the game")
+            self.send_error(self.clients[client_id], "You must be in a room to start the game")
             return
             
-        try:
-            room = self.rooms_collection.find_one({"room_id": room_id})
-            if not room:
-                self.send_error(self.clients[client_id]['socket'], "Room not found")
-                return
+        async with self.room_lock(room_id):
+            try:
+                room = self.rooms.get(room_id)
+                if not room:
+                    self.send_error(self.clients[client_id], "Room not found")
+                    return
+                    
+                if room.creator != username:
+                    self.send_error(self.clients[client_id], "Only the room creator can start the game")
+                    return
+                    
+                # Start the game
+                room.game_started = True
+                room.current_question = 0
+                self.update_room(room_id, [
+                    {"op": "set", "path": ["game_started"], "val": True},
+                    {"op": "set", "path": ["current_question"], "val": 0}
+                ])
                 
-            if room['creator'] != username:
-                self.send_error(self.clients[client_id]['socket'], "Only the room creator can start the game")
-                return
+                self.send_payload(self.clients[client_id], START_GAME_RESPONSE)
                 
-            # Start the game
-            self.rooms_collection.update_one(
-                {"room_id": room_id},
-                {"$set": {"game_started": True, "current_question": 0}}
-            )
-            
-            # Update in-memory data
-            if room_id in self.rooms:
-                self.rooms[room_id]['game_started'] = True
-                self.rooms[room_id]['current_question'] = 0
-            
-            response = {
-                'action': 'start_game_response',
-                'status': 'success',
-                'message': "Game started! All players will now begin the quiz."
-            }
-            self.send_message(self.clients[client_id]['socket'], response)
-            
-            # Notify all players in the room
-            self.broadcast_room_update(room_id)
-            
-        except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Failed to start game: {str(e)}")
+                # Notify all players in the room
+                await self.broadcast_room_update(room_id)
+                
+            except Exception as e:
+                self.send_error(self.clients[client_id], f"Failed to start game: {str(e)}")
 
     # Gameplay Handlers
-    def handle_submit_answer(self, client_id, data):
+    async def handle_submit_answer(self, client_id, data):
         """Handle quiz answer submission"""
-        username = self.clients[client_id].get('username')
-        room_id = self.clients[client_id].get('room_id')
+        username = self.clients[client_id].username
+        room_id = self.clients[client_id].room_id
         question_index = data.get('question_index')
         answer = data.get('answer')
         
-        if not all([username, room_id, question_index is not None, answer]):
-            self.send_error(self.clients[client_id]['socket'], "Missing answer data")
+        if not (username and room_id and question_index is not None and answer):
+            self.send_error(self.clients[client_id], "Missing answer data")
             return
             
-        try:
-            room = self.rooms_collection.find_one({"room_id": room_id})
-            if not room:
-                self.send_error(self.clients[client_id]['socket'], "Room not found")
-                return
-                
-            # Store answer
-            player_answers = room.get('player_answers', {})
-            if username not in player_answers:
-                player_answers[username] = []
-                
-            # Ensure we have enough slots
-            while len(player_answers[username]) <= question_index:
-                player_answers[username].append(None)
-                
-            player_answers[username][question_index] = answer
-            
-            self.rooms_collection.update_one(
-                {"room_id": room_id},
-                {"$set": {"player_answers": player_answers}}
-            )
-            
-            # Update in-memory data
-            if room_id in self.rooms:
-                self.rooms[room_id]['player_answers'] = player_answers
+        if answer not in ANSWER_OPTIONS:
+            self.send_error(self.clients[client_id], "Invalid answer")
+            return
             
-            response = {
-                'action': 'submit_answer_response',
-                'status': 'success',
-                'message': "Answer submitted successfully!"
-            }
-            self.send_message(self.clients[client_id]['socket'], response)
+        if not isinstance(question_index, int) or not 0 <= question_index < QUESTION_COUNT:
+            self.send_error(self.clients[client_id], "Invalid question index")
+            return
             
-            # Check if all questions answered and calculate role
-            if len(player_answers[username]) == 5 and all(player_answers[username]):
-                role = self.calculate_role(player_answers[username])
-                
-                # Store role
-                player_roles = room.get('player_roles', {})
-                player_roles[username] = role
-                
-                self.rooms_collection.update_one(
-                    {"room_id": room_id},
-                    {"$set": {"player_roles": player_roles}}
-                )
+        async with self.room_lock(room_id):
+            try:
+                room = self.rooms.get(room_id)
+                if not room:
+                    self.send_error(self.clients[client_id], "Room not found")
+                    return
+                    
+                # Store answer in the player's fixed-size answer list
+                player_answers = room.player_answers
+                answers = player_answers.get(username)
+                if answers is None:
+                    answers = player_answers[username] = [None] * QUESTION_COUNT
+                    answers[question_index] = answer
+                    patch = {"op": "set", "path": ["player_answers", username], "val": list(answers)}
+                else:
+                    answers[question_index] = answer
+                    patch = {"op": "set", "path": ["player_answers", username, question_index], "val": answer}
+                self.update_room(room_id, [patch])
                 
-                if room_id in self.rooms:
-                    self.rooms[room_id]['player_roles'] = player_roles
+                self.send_payload(self.clients[client_id], SUBMIT_ANSWER_RESPONSE)
                 
-                # Send role to player
-                role_response = {
-                    'action': 'role_assigned',
-                    'status': 'success',
-                    'data': {
-                        'role': role
-                    },
-                    'message': f"Your role is: {role}"
-                }
-                self.send_message(self.clients[client_id]['socket'], role_response)
-                
-        except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Failed to submit answer: {str(e)}")
+                # Check if all questions answered and calculate role
+                if None not in answers:
+                    role = self.calculate_role(answers)
+                    
+                    # Store role
+                    player_roles = room.player_roles
+                    player_roles[username] = role
+                    self.update_room(room_id, [
+                        {"op": "set", "path": ["player_roles", username], "val": role}
+                    ])
+                    
+                    # Send role to player
+                    self.send_payload(self.clients[client_id], ROLE_ASSIGNED_RESPONSES[role])
+                    
+            except Exception as e:
+                self.send_error(self.clients[client_id], f"Failed to submit answer: {str(e)}")
 
-    def handle_select_character(self, client_id, data):
+    async def handle_select_character(self, client_id, data):
         """Handle character selection"""
-        username = self.clients[client_id].get('username')
-        room_id = self.clients[client_id].get('room_id')
+        username = self.clients[client_id].username
+        room_id = self.clients[client_id].room_id
         character = data.get('character')
         
-        if not all([username, room_id, character]):
-            self.send_error(self.clients[client_id]['socket'], "Missing character data")
+        if not (username and room_id and character):
+            self.send_error(self.clients[client_id], "Missing character data")
             return
             
-        try:
-            room = self.rooms_collection.find_one({"room_id": room_id})
-            if not room:
-                self.send_error(self.clients[client_id]['socket'], "Room not found")
-                return
+        async with self.room_lock(room_id):
+            try:
+                room = self.rooms.get(room_id)
+                if not room:
+                    self.send_error(self.clients[client_id], "Room not found")
+                    return
+                    
+                # Check if character is already locked by another player
+                player_characters = room.player_characters
+                if character in player_characters.values():
+                    self.send_error(self.clients[client_id], "This character is already taken")
+                    return
+                    
+                # Check if player already has a locked character
+                character_locked = room.character_locked
+                if character_locked.get(username, False):
+                    self.send_error(self.clients[client_id], "Your character is already locked and cannot be changed")
+                    return
+                    
+                # Assign character
+                player_characters[username] = character
+                self.update_room(room_id, [
+                    {"op": "set", "path": ["player_characters", username], "val": character}
+                ])
                 
-            # Check if character is already locked by another player
-            player_characters = room.get('player_characters', {})
-            if character in player_characters.values():
-                self.send_error(self.clients[client_id]['socket'], "This character is already taken")
-                return
+                response = {
+                    'action': 'select_character_response',
+                    'status': 'success',
+                    'data': {
+                        'character': character
+                    },
+                    'message': f"Character {character} selected!"
+                }
+                self.send_message(self.clients[client_id], response)
                 
-            # Check if player already has a locked character
-            character_locked = room.get('character_locked', {})
-            if character_locked.get(username, False):
-                self.send_error(self.clients[client_id]['socket'], "Your character is already locked and cannot be changed")
-                return
+                # Update user's character in their profile
+                self.update_user(username, {"character": character})
                 
-            # Assign character
-            player_characters[username] = character
-            
-            self.rooms_collection.update_one(
-                {"room_id": room_id},
-                {"$set": {"player_characters": player_characters}}
-            )
-            
-            # Update in-memory data
-            if room_id in self.rooms:
-                self.rooms[room_id]['player_characters'] = player_characters
-            
-            response = {
-                'action': 'select_character_response',
-                'status': 'success',
-                'data': {
-                    'character': character
-                },
-                'message': f"Character {character} selected!"
-            }
-            self.send_message(self.clients[client_id]['socket'], response)
-            
-            # Update user's character in their profile
-            self.users_collection.update_one(
-                {"username": username},
-                {"$set": {"character": character}}
-            )
-            
-            # Notify all players in the room
-            self.broadcast_room_update(room_id)
-            
-        except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Failed to select character: {str(e)}")
+                # Notify all players in the room
+                await self.broadcast_room_update(room_id)
+                
+            except Exception as e:
+                self.send_error(self.clients[client_id], f"Failed to select character: {str(e)}")
 
-    def handle_lock_character(self, client_id, data):
+    async def handle_lock_character(self, client_id, data):
         """Handle character locking - once locked, cannot be changed"""
-        username = self.clients[client_id].get('username')
-        room_id = self.clients[client_id].get('room_id')
+        username = self.clients[client_id].username
+        room_id = self.clients[client_id].room_id
         
-        if not all([username, room_id]):
-            self.send_error(self.clients[client_id]['socket'], "Missing data for character lock")
+        if not (username and room_id):
+            self.send_error(self.clients[client_id], "Missing data for character lock")
             return
             
-        try:
-            room = self.rooms_collection.find_one({"room_id": room_id})
-            if not room:
-                self.send_error(self.clients[client_id]['socket'], "Room not found")
-                return
+        async with self.room_lock(room_id):
+            try:
+                room = self.rooms.get(room_id)
+                if not room:
+                    self.send_error(self.clients[client_id], "Room not found")
+                    return
+                    
+                # Check if player has selected a character
+                player_characters = room.player_characters
+                if username not in player_characters:
+                    self.send_error(self.clients[client_id], "You must select a character before locking it")
+                    return
+                    
+                # Lock character
+                character_locked = room.character_locked
+                character_locked[username] = True
+                self.update_room(room_id, [
+                    {"op": "set", "path": ["character_locked", username], "val": True}
+                ])
                 
-            # Check if player has selected a character
-            player_characters = room.get('player_characters', {})
-            if username not in player_characters:
-                self.send_error(self.clients[client_id]['socket'], "You must select a character before locking it")
-                return
+                # Update client state
+                self.clients[client_id].character_locked = True
                 
-            # Lock character
-            character_locked = room.get('character_locked', {})
-            character_locked[username] = True
-            
-            self.rooms_collection.update_one(
-                {"room_id": room_id},
-                {"$set": {"character_locked": character_locked}}
-            )
-            
-            # Update in-memory data
-            if room_id in self.rooms:
-                self.rooms[room_id]['character_locked'] = character_locked
-            
-            # Update client state
-            self.clients[client_id]['character_locked'] = True
-            
-            response = {
-                'action': 'lock_character_response',
-                'status': 'success',
-                'message': "Character locked! You cannot change it now."
-            }
-            self.send_message(self.clients[client_id]['socket'], response)
-            
-            # Notify all players in the room
-            self.broadcast_room_update(room_id)
-            
-        except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Failed to lock character: {str(e)}")
+                self.send_payload(self.clients[client_id], LOCK_CHARACTER_RESPONSE)
+                
+                # Notify all players in the room
+                await self.broadcast_room_update(room_id)
+                
+            except Exception as e:
+                self.send_error(self.clients[client_id], f"Failed to lock character: {str(e)}")
 
-    def handle_leave_room(self, client_id, data):
+    async def handle_leave_room(self, client_id, data):
         """Handle leaving a room"""
-        username = self.clients[client_id].get('username')
-        room_id = self.clients[client_id].get('room_id')
+        username = self.clients[client_id].username
+        room_id = self.clients[client_id].room_id
         
         if not username or not room_id:
-            self.send_error(self.clients[client_id]['socket'], "Not in a room")
+            self.send_error(self.clients[client_id], "Not in a room")
             return
             
-        try:
-            room = self.rooms_collection.find_one({"room_id": room_id})
-            if not room:
-                self.send_error(self.clients[client_id]['socket'], "Room not found")
-                return
+        async with self.room_lock(room_id):
+            try:
+                room = self.rooms.get(room_id)
+                if not room:
+                    self.send_error(self.clients[client_id], "Room not found")
+                    return
+                    
+                players_left = self.remove_from_room(room, [self.clients[client_id]])
+                
+                self.send_payload(self.clients[client_id], LEAVE_ROOM_RESPONSE)
                 
+                # Notify remaining players
+                if players_left:
+                    await self.broadcast_room_update(room_id)
+                await self.broadcast_room_list()
+                
+            except Exception as e:
+                self.send_error(self.clients[client_id], f"Failed to leave room: {str(e)}")
+
+    def remove_from_room(self, room, leaving):
+        """Take several clients out of a room in one update; the caller holds the room lock.
+        
+        Deletes the room once it is empty; returns whether any players are left.
+        """
+        room_id = room.room_id
+        players = room.players
+        patches = []
+        for client_data in leaving:
+            username = client_data.username
+            
             # Remove player from room
-            players = room.get('players', [])
             if username in players:
                 players.remove(username)
                 
             # Remove player's character and lock status
-            player_characters = room.get('player_characters', {})
-            if username in player_characters:
-                del player_characters[username]
-                
-            character_locked = room.get('character_locked', {})
-            if username in character_locked:
-                del character_locked[username]
-                
-            # If room is empty, delete it
-            if not players:
-                self.rooms_collection.delete_one({"room_id": room_id})
-                if room_id in self.rooms:
-                    del self.rooms[room_id]
-            else:
-                # Update room
-                self.rooms_collection.update_one(
-                    {"room_id": room_id},
-                    {"$set": {
-                        "players": players,
-                        "player_characters": player_characters,
-                        "character_locked": character_locked
-                    }}
-                )
-                
-                # Update in-memory data
-                if room_id in self.rooms:
-                    self.rooms[room_id]['players'] = players
-                    self.rooms[room_id]['player_characters'] = player_characters
-                    self.rooms[room_id]['character_locked'] = character_locked
-            
+            if room.player_characters.pop(username, None) is not None:
+                patches.append({"op": "del", "path": ["player_characters", username]})
+            if room.character_locked.pop(username, None) is not None:
+                patches.append({"op": "del", "path": ["character_locked", username]})
+                
             # Clear client's room
-            self.clients[client_id]['room_id'] = None
-            self.clients[client_id]['character_locked'] = False
-            
-            response = {
-                'action': 'leave_room_response',
-                'status': 'success',
-                'message': "Left the room successfully"
-            }
-            self.send_message(self.clients[client_id]['socket'], response)
+            client_data.room_id = None
+            client_data.room_version = None
+            client_data.character_locked = False
+            self.room_members.get(room_id, set()).discard(client_data)
             
-            # Notify remaining players
-            if players:
-                self.broadcast_room_update(room_id)
-            self.broadcast_room_list()
+        # If room is empty, delete it
+        if not players:
+            self.delete_room(room_id)
+            return False
             
-        except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Failed to leave room: {str(e)}")
+        self.update_room(room_id, [{"op": "set", "path": ["players"], "val": list(players)}] + patches)
+        return True
 
-    def handle_get_room_status(self, client_id, data):
+    async def handle_get_room_status(self, client_id, data):
         """Handle request for room status"""
-        room_id = self.clients[client_id].get('room_id')
+        room_id = self.clients[client_id].room_id
         
         if not room_id:
-            self.send_error(self.clients[client_id]['socket'], "Not in a room")
+            self.send_error(self.clients[client_id], "Not in a room")
             return
             
         try:
-            room = self.rooms_collection.find_one({"room_id": room_id})
+            room = self.rooms.get(room_id)
             if not room:
-                self.send_error(self.clients[client_id]['socket'], "Room not found")
+                self.send_error(self.clients[client_id], "Room not found")
                 return
                 
+            self.clients[client_id].room_version = room.version
             response = {
                 'action': 'room_status_response',
                 'status': 'success',
@@ -683,127 +993,188 @@ class GameServer:
                     'room_data': room
                 }
             }
-            self.send_message(self.clients[client_id]['socket'], response)
+            self.send_message(self.clients[client_id], response)
             
         except Exception as e:
-            self.send_error(self.clients[client_id]['socket'], f"Failed to get room status: {str(e)}")
+            self.send_error(self.clients[client_id], f"Failed to get room status: {str(e)}")
 
     # Utility Methods
     def validate_email(self, email):
         """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        return EMAIL_PATTERN.match(email) is not None
 
     def generate_room_id(self):
-        """Generate unique room ID"""
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+        """Generate unique room ID, checked against the in-memory rooms"""
+        while True:
+            room_id = ''.join(secrets.choice(ROOM_ID_ALPHABET) for _ in range(6))
+            if room_id not in self.rooms:
+                return room_id
 
     def calculate_role(self, answers):
         """Calculate role based on answers"""
-        role_mapping = {
-            'A': 'Barbarian / Monk (Melee DPS)',
-            'B': 'Fighter/Knight (Tank)',
-            'C': 'Rogue / Scout-Ranger (Stealth/Agile)',
-            'D': 'Gunman / Ranger (Ranged Physical)',
-            'E': 'Bard / Priest / Alchemist (Support/Healing)',
-            'F': 'Wizard / Druids / Necromancer / Elementalist / Summoner / Sorcerer / Warlock (Magical Combatants)'
-        }
-        
-        # Count occurrences of each option
-        option_count = {'A': 0, 'B': 0, 'C': 0, 'D': 0, 'E': 0, 'F': 0}
+        # Count occurrences of each option; answers are validated to be 'A'-'F' on submit
+        counts = [0] * len(ROLES)
         for answer in answers:
-            option_count[answer] += 1
+            counts[ord(answer) - 65] += 1
         
-        # Find the option with maximum count
-        max_option = max(option_count, key=option_count.get)
-        max_count = option_count[max_option]
-        
-        # Check for ties
-        tied_options = [opt for opt, count in option_count.items() if count == max_count]
-        
-        if len(tied_options) > 1:
-            # If tie, choose the first one in order A-F
-            chosen_option = tied_options[0]
-        else:
-            chosen_option = max_option
-        
-        return role_mapping[chosen_option]
+        # index() returns the first maximum, so ties go to the earliest option A-F
+        return ROLES[counts.index(max(counts))]
 
-    def broadcast_room_update(self, room_id):
-        """Broadcast room update to all players in the room"""
+    async def broadcast_room_update(self, room_id):
+        """Broadcast room changes to all players in the room.
+        
+        Players holding the version the pending patches start from get only the patches;
+        anyone else out of date gets the full room.
+        """
         try:
-            room = self.rooms_collection.find_one({"room_id": room_id})
+            room = self.rooms.get(room_id)
             if not room:
                 return
-                
-            message = {
-                'action': 'room_updated',
-                'data': {
-                    'room_data': room
-                }
-            }
             
-            for client_id, client_data in self.clients.items():
-                if client_data.get('room_id') == room_id:
-                    self.send_message(client_data['socket'], message)
+            base_version, patches = self.room_patches.pop(room_id, (room.version, []))
+            patch_payload = None
+            
+            for client_data in self.room_members.get(room_id, ()):
+                if client_data.room_version == room.version:
+                    continue
+                    
+                if client_data.room_version == base_version:
+                    if patch_payload is None:
+                        patch_payload = encode_room_patch(room_id, base_version, room.version, patches)
+                    self.send_payload(client_data, patch_payload)
+                else:
+                    self.send_payload(client_data, self.room_snapshot(room))
+                client_data.room_version = room.version
                     
         except Exception as e:
-            print(f"❌ Error broadcasting room update: {e}")
+            logger.error("❌ Error broadcasting room update: %s", e)
 
-    def broadcast_room_list(self):
-        """Broadcast updated room list to all clients"""
-        try:
-            rooms = list(self.rooms_collection.find({"is_active": True}))
-            
+    def room_snapshot(self, room):
+        """Full room_updated message, serialized once per room change; update_room() drops the cache"""
+        payload = self.room_payloads.get(room.room_id)
+        if payload is None:
             message = {
-                'action': 'rooms_updated',
+                'action': 'room_updated',
                 'data': {
-                    'rooms': rooms
+                    'room_data': room
                 }
             }
-            
+            payload = self.room_payloads[room.room_id] = encode_message(message)
+        return payload
+
+    async def broadcast_room_list(self):
+        """Broadcast updated room list to all clients, coalescing calls within ROOM_LIST_DELAY"""
+        if self.room_list_timer is None:
+            self.room_list_timer = asyncio.get_running_loop().call_later(ROOM_LIST_DELAY, self.send_room_list)
+
+    def send_room_list(self):
+        """Send the current room list to every client"""
+        self.room_list_timer = None
+        try:
+            payload = self.room_list_payload(ROOMS_UPDATED_TEMPLATE)
             for client_data in self.clients.values():
-                self.send_message(client_data['socket'], message)
+                self.send_payload(client_data, payload)
                 
         except Exception as e:
-            print(f"❌ Error broadcasting room list: {e}")
+            logger.error("❌ Error broadcasting room list: %s", e)
 
-    def send_message(self, socket, message):
-        """Send message to client"""
-        try:
-            socket.send(json.dumps(message).encode('utf-8'))
-        except Exception as e:
-            print(f"❌ Error sending message: {e}")
+    def send_message(self, client_data, message):
+        """Queue message in the client's outbox.
+        
+        Encoding errors propagate to the calling handler, which reports them to the client.
+        """
+        self.send_payload(client_data, encode_message(message))
+
+    def send_payload(self, client_data, payload):
+        """Queue an already serialized message, so broadcasts encode once for all recipients.
+        
+        Everything queued for a client during one event loop iteration goes out in a single write.
+        """
+        if not client_data.outbox:
+            if not self.outbox_queue:
+                asyncio.get_running_loop().call_soon(self.flush_outboxes)
+            self.outbox_queue.append(client_data)
+        client_data.outbox += payload
+
+    def flush_outboxes(self):
+        """Hand each queued outbox to its transport; handle_client drains it.
+        
+        This is the one place sends can fail: the connection is dropped, and handle_client
+        then sees it close and disconnects the client.
+        """
+        queue, self.outbox_queue = self.outbox_queue, []
+        for client_data in queue:
+            transport = client_data.writer.transport
+            try:
+                transport.write(client_data.outbox)
+            except Exception as e:
+                logger.error("❌ Error sending message: %s", e)
+                transport.abort()
+                
+            # The outbox is reused unless the transport is still holding part of it to send later
+            if transport.get_write_buffer_size():
+                client_data.outbox = bytearray()
+            else:
+                client_data.outbox.clear()
 
-    def send_error(self, socket, error_message):
+    def send_error(self, client_data, error_message):
         """Send error message to client"""
-        error_response = {
-            'action': 'error',
-            'status': 'error',
-            'message': error_message
-        }
-        self.send_message(socket, error_response)
+        self.send_payload(client_data, encode_error(error_message))
 
-    def disconnect_client(self, client_id):
+    async def disconnect_client(self, client_id, abort=False):
         """Handle client disconnection"""
-        if client_id in self.clients:
-            client_data = self.clients[client_id]
-            
-            # Leave room if in one
-            room_id = client_data.get('room_id')
-            if room_id:
-                self.handle_leave_room(client_id, {})
+        await self.disconnect_many([client_id], abort)
+
+    async def disconnect_many(self, client_ids, abort=False):
+        """Disconnect several clients with one room update per affected room and one room list broadcast.
+        
+        Orderly disconnects flush what is queued and close normally; abort=True is for broken
+        connections and resets them, so nothing lingers in the send queue or in TIME_WAIT.
+        """
+        # One pop per client; ids already disconnected are skipped, and nothing re-entered below can see them
+        victims = []
+        for client_id in client_ids:
+            client_data = self.clients.pop(client_id, None)
+            if client_data is not None:
+                victims.append((client_id, client_data))
+        
+        # Leave rooms, grouped so each room changes once however many of its players went
+        leaving_by_room = {}
+        for client_id, client_data in victims:
+            if client_data.room_id:
+                leaving_by_room.setdefault(client_data.room_id, []).append(client_data)
                 
-            # Close socket
+        for room_id, leaving in leaving_by_room.items():
+            async with self.room_lock(room_id):
+                room = self.rooms.get(room_id)
+                if room and self.remove_from_room(room, leaving):
+                    await self.broadcast_room_update(room_id)
+                    
+        # Close connections, sending anything still queued for them first unless aborting
+        for client_id, client_data in victims:
+            transport = client_data.writer.transport
             try:
-                client_data['socket'].close()
+                if abort:
+                    sock = transport.get_extra_info('socket')
+                    if sock is not None:
+                        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                    transport.abort()
+                else:
+                    transport.write(client_data.outbox)
+                    client_data.outbox = bytearray()
+                    transport.close()
             except:
                 pass
-                
-            # Remove from clients
-            del self.clients[client_id]
-            print(f"🔌 Client {client_id} disconnected")
+            logger.info("🔌 Client %s disconnected", client_id)
+            
+        if leaving_by_room:
+            await self.broadcast_room_list()
 
 if __name__ == "__main__":
-    server = GameServer()
-    server.start_server()
\ No newline at end of file
+    log_listener = setup_logging()
+    try:
+        server = GameServer()
+        run = uvloop.run if uvloop else asyncio.run
+        run(server.start_server())
+    finally:
+        log_listener.stop()
\ No newline at end of file
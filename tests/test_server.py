@@ -0,0 +1,121 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('PORT', '5555')
+
+import orjson
+import server
+
+class FakeTransport:
+    """Collects everything the server writes to one client"""
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def messages(self):
+        lines = bytes(self.data).splitlines()
+        self.data.clear()
+        return [orjson.loads(line) for line in lines]
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+
+class RoomMembershipTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        with mock.patch.object(server.GameServer, 'setup_database'):
+            self.server = server.GameServer()
+        self.server.rooms_collection = mock.MagicMock()
+        self.server.users_collection = mock.MagicMock()
+
+    def tearDown(self):
+        self.server.bcrypt_pool.shutdown()
+        self.server.db_writer.shutdown()
+
+    def connect(self, username):
+        client_data = server.ClientState(FakeWriter(), username=username)
+        self.server.clients[username] = client_data
+        return client_data
+
+    async def settle(self):
+        """Let queued outboxes flush"""
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+    async def test_joining_a_second_room_is_refused(self):
+        alice, bob, carol = self.connect('alice'), self.connect('bob'), self.connect('carol')
+        await self.server.handle_create_room('alice', {})
+        await self.server.handle_create_room('carol', {})
+        first_room, second_room = alice.room_id, carol.room_id
+        
+        await self.server.handle_join_room('bob', {'room_id': first_room})
+        await self.settle()
+        bob.writer.transport.messages()
+        
+        await self.server.handle_join_room('bob', {'room_id': second_room})
+        await self.settle()
+        [error] = bob.writer.transport.messages()
+        self.assertEqual(error['action'], 'error')
+        self.assertEqual(bob.room_id, first_room)
+        self.assertNotIn(bob, self.server.room_members[second_room])
+        self.assertNotIn('bob', self.server.rooms[second_room].players)
+        
+        # Traffic for the other room never reaches bob
+        await self.server.handle_start_game('carol', {})
+        await self.settle()
+        self.assertEqual(bob.writer.transport.messages(), [])
+        
+        await self.server.handle_start_game('alice', {})
+        await self.settle()
+        [patch] = [m for m in bob.writer.transport.messages() if m['action'] == 'room_patch']
+        self.assertEqual(patch['data']['room_id'], first_room)
+
+    async def test_creating_a_room_while_in_one_is_refused(self):
+        alice = self.connect('alice')
+        await self.server.handle_create_room('alice', {})
+        first_room = alice.room_id
+        
+        await self.server.handle_create_room('alice', {})
+        self.assertEqual(alice.room_id, first_room)
+        self.assertEqual(list(self.server.rooms), [first_room])
+
+    async def test_signing_in_again_leaves_the_previous_room(self):
+        alice, bob = self.connect('alice'), self.connect('bob')
+        await self.server.handle_create_room('alice', {})
+        room_id = alice.room_id
+        await self.server.handle_join_room('bob', {'room_id': room_id})
+        
+        # The client logs out locally and signs in again on the same connection
+        self.server.users_collection.find_one.return_value = {
+            'username': 'alice', 'email': 'alice@example.com', 'password_hash': b'hash'
+        }
+        with mock.patch.object(self.server, 'run_bcrypt', mock.AsyncMock(return_value=True)):
+            await self.server.handle_sign_in('alice', {'username': 'alice', 'password': 'secret'})
+        self.assertIsNone(alice.room_id)
+        self.assertEqual(self.server.rooms[room_id].players, ['bob'])
+        self.assertNotIn(alice, self.server.room_members[room_id])
+        
+        await self.server.handle_create_room('alice', {})
+        self.assertIsNotNone(alice.room_id)
+        self.assertNotEqual(alice.room_id, room_id)
+
+class RoomStateTest(unittest.TestCase):
+    def test_short_answer_lists_are_padded_on_load(self):
+        room = server.RoomState.from_document({
+            'room_id': 'ABC123',
+            'creator': 'alice',
+            'player_answers': {'alice': ['A', 'B']}
+        })
+        self.assertEqual(room.player_answers['alice'], ['A', 'B'] + [None] * (server.QUESTION_COUNT - 2))
+
+if __name__ == '__main__':
+    unittest.main()